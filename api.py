@@ -0,0 +1,259 @@
+"""Read-only HTTP/JSON API over the informality cube.
+
+Serves the numbers behind fixed_app.py from the same cube and metrics code:
+
+    GET /countries                                     countries and year range
+    GET /rates?countries=BRA,KHM&sex=SEX_F&from=2015&to=2020&min_samples=30
+    GET /gaps?countries=BRA&intervals=1                female - male rate per year
+    GET /ratios?countries=BRA&intervals=1              female / male mean rate, %
+    GET /stats?countries=BRA&sex=SEX_M                 descriptive statistics
+
+Every response has an ETag derived from the data file's content hash and the
+normalised query. A request whose If-None-Match matches gets 304 before anything is
+computed, and full bodies are kept in an in-memory LRU. A client polling the same
+query therefore costs one stat() call per request until the data changes.
+
+    python api.py [--host 127.0.0.1] [--port 8503] [--csv EMP_TEM2_SEX_EC4_IFL_NB_A.csv]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from cube import CUBE_PREDICATES, GENDERS, load_cube
+from data_loader import file_fingerprint
+from metrics import metrics_cache
+from uncertainty import with_intervals
+
+CSV = 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv'
+MAX_ENTRIES = int(os.environ.get('API_CACHE_ENTRIES', 1024))
+
+logger = logging.getLogger('dashboard.api')
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _list(value):
+    return sorted({item for part in value for item in part.split(',') if item})
+
+
+def _int(value):
+    try:
+        return int(value[-1])
+    except ValueError:
+        raise BadRequest(f"not an integer: {value[-1]!r}") from None
+
+
+def _flag(value):
+    if value[-1] not in ('0', '1', 'true', 'false'):
+        raise BadRequest(f"not a flag: {value[-1]!r}")
+    return value[-1] in ('1', 'true')
+
+
+# Query parameters and their parsers
+PARAMS = {
+    'countries': _list,
+    'sex': _list,
+    'from': _int,
+    'to': _int,
+    'min_samples': _int,
+    'intervals': _flag,
+}
+
+
+def parse_query(query, allowed):
+    """Parsed parameters of a query string; unknown or malformed ones raise BadRequest."""
+    parsed = {}
+    for name, value in parse_qs(query, keep_blank_values=True).items():
+        if name not in allowed:
+            raise BadRequest(f"unknown parameter {name!r}; expected one of {sorted(allowed)}")
+        parsed[name] = PARAMS[name](value)
+    sexes = parsed.get('sex')
+    if sexes and not set(sexes) <= set(GENDERS):
+        raise BadRequest(f"sex must be among {GENDERS}")
+    return parsed
+
+
+def _selection(cube, q):
+    years = None
+    if 'from' in q or 'to' in q:
+        lo, hi = cube.year_range()
+        years = (q.get('from', lo), q.get('to', hi))
+    return cube.select(q.get('countries'), sexes=q.get('sex') or GENDERS, years=years,
+                       min_samples=q.get('min_samples'))
+
+
+def countries(cube, q):
+    lo, hi = cube.year_range()
+    return {'countries': cube.countries(), 'years': [lo, hi]}
+
+
+def rates(cube, q):
+    return _selection(cube, q)
+
+
+def gaps(cube, q):
+    table = metrics_cache.get(_selection(cube, q))['gender_gap']
+    if table is None:
+        raise BadRequest("gaps need both sexes in the selection")
+    return with_intervals(table, cube, 'gap') if q.get('intervals') else table
+
+
+def ratios(cube, q):
+    if q.get('intervals') and {'from', 'to', 'min_samples'} & q.keys():
+        raise BadRequest("ratio intervals cover every cell of a country; drop from/to/min_samples or intervals")
+    table = metrics_cache.get(_selection(cube, q))['female_vs_male']
+    if table is None:
+        raise BadRequest("ratios need both sexes in the selection")
+    return with_intervals(table, cube, 'ratio') if q.get('intervals') else table
+
+
+def stats(cube, q):
+    return metrics_cache.get(_selection(cube, q))['desc_stats']
+
+
+# path: (handler, allowed parameters)
+ENDPOINTS = {
+    '/countries': (countries, set()),
+    '/rates': (rates, {'countries', 'sex', 'from', 'to', 'min_samples'}),
+    '/gaps': (gaps, {'countries', 'from', 'to', 'min_samples', 'intervals'}),
+    '/ratios': (ratios, {'countries', 'from', 'to', 'min_samples', 'intervals'}),
+    '/stats': (stats, {'countries', 'sex', 'from', 'to', 'min_samples'}),
+}
+
+
+def _matches(if_none_match, etag):
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+class Api:
+    """Request handling without the socket layer: `get` maps (path, query) to a response.
+
+    Bodies are cached per (file content hash, path, normalised query) in an LRU that is
+    shared by every request thread; a new data version simply misses.
+    """
+
+    def __init__(self, csv_path=CSV, max_entries=MAX_ENTRIES):
+        self.csv_path = csv_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, query='', if_none_match=None):
+        """Return (status, headers, body bytes) for a GET request."""
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            return self._error(HTTPStatus.NOT_FOUND, f"no endpoint {path}; try one of {sorted(ENDPOINTS)}")
+        handler, allowed = endpoint
+        try:
+            q = parse_query(query, allowed)
+        except BadRequest as exc:
+            return self._error(HTTPStatus.BAD_REQUEST, str(exc))
+
+        digest = file_fingerprint(self.csv_path)[3]
+        canonical = json.dumps(q, sort_keys=True, separators=(',', ':'))
+        etag = '"' + hashlib.sha1(f'{digest}|{path}|{canonical}'.encode()).hexdigest()[:24] + '"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if _matches(if_none_match, etag):
+            with self._lock:
+                self.not_modified += 1
+            return HTTPStatus.NOT_MODIFIED, headers, b''
+
+        key = (digest, path, canonical)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if body is None:
+            try:
+                body = self._body(handler, path, q, digest)
+            except BadRequest as exc:
+                return self._error(HTTPStatus.BAD_REQUEST, str(exc))
+            with self._lock:
+                self.misses += 1
+                # Bodies for an older data version can never be served again
+                for old in [k for k in self._entries if k[0] != digest]:
+                    del self._entries[old]
+                self._entries[key] = body
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return HTTPStatus.OK, dict(headers, **{'Content-Type': 'application/json'}), body
+
+    def _body(self, handler, path, q, digest):
+        result = handler(load_cube(self.csv_path, CUBE_PREDICATES), q)
+        # to_json writes NaN as null; frames go in as already-encoded JSON
+        rows = result.to_json(orient='records') if hasattr(result, 'to_json') else json.dumps(result)
+        head = json.dumps({'snapshot': digest, 'endpoint': path, 'query': q})
+        return f'{head[:-1]}, "data": {rows}}}'.encode()
+
+    def _error(self, status, message):
+        body = json.dumps({'error': message, 'status': int(status)}).encode()
+        return status, {'Content-Type': 'application/json'}, body
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = 'InformalityAPI/1'
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        url = urlsplit(self.path)
+        status, headers, body = self.server.api.get(url.path, url.query, self.headers.get('If-None-Match'))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info('%s %s', self.address_string(), format % args)
+
+
+def make_server(host='127.0.0.1', port=8503, csv_path=CSV):
+    """HTTP server for the API; `port=0` picks a free port (see `server.server_address`)."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.api = Api(csv_path)
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8503)
+    parser.add_argument('--csv', default=CSV)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    server = make_server(args.host, args.port, args.csv)
+    # Build the cube before the first request rather than during it
+    load_cube(args.csv, CUBE_PREDICATES)
+    print(f"serving {args.csv} on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
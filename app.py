@@ -1,99 +1,104 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
+
+import profiling
+from chart_backend import show_chart
+from cube import CUBE_PREDICATES, DEFAULT_COUNTRIES, GENDERS, describe_changes, load_cube, on_refresh
+from facets import facet_pages
+from figure_cache import figure_cache
+from metrics import metrics_cache
 
 st.set_page_config(page_title="Gendered Informality in Creative Occupations", layout="wide")
 
 st.title("Gendered Informality in Creative Occupations")
+# Stage timings for this rerun (DASHBOARD_PROFILE=log|panel)
+profiling.start_rerun("app")
 
-# Load dataset
+# Load dataset and build the informality cube (cached across reruns).
+# Large bulk files are streamed in chunks, with progress shown while they load.
 q1_file = "EMP_TEM2_SEX_EC4_IFL_NB_A.csv"
-q1_data = pd.read_csv(q1_file)
-
-# Filter dataset
-q1_filtered = q1_data[
-    (q1_data['classif1'] == 'EC4_MEDIAISIC_YES') &
-    (q1_data['classif2'].isin(['IFL_NATURE_FORMAL', 'IFL_NATURE_INFORMAL'])) &
-    (q1_data['ref_area'].isin(['GBR', 'FRA', 'BRA', 'ARG', 'KHM', 'COL'])) &
-    (q1_data['sex'].isin(['SEX_M', 'SEX_F']))
-]
-
-q1_filtered = q1_filtered[['ref_area', 'time', 'sex', 'classif2', 'obs_value', 'obs_status']]
-
-# Pivot for informality calculation
-q1_pivot = q1_filtered.pivot_table(
-    index=['ref_area', 'time', 'sex'],
-    columns='classif2',
-    values='obs_value',
-    aggfunc='sum'
-).reset_index()
-
-q1_pivot['informality_rate'] = q1_pivot['IFL_NATURE_INFORMAL'] / (
-    q1_pivot['IFL_NATURE_FORMAL'] + q1_pivot['IFL_NATURE_INFORMAL']
-)
+# A revised extract only recomputes stats and re-renders figures for affected countries
+on_refresh(figure_cache.on_data_refresh)
+on_refresh(metrics_cache.on_data_refresh)
+loading = st.empty()
+with profiling.stage("load_cube"):
+    q1_cube = load_cube(q1_file, CUBE_PREDICATES,
+                        progress=lambda done: loading.progress(done, text="Reading ILOSTAT extract..."))
+loading.empty()
+if q1_cube.changes is not None:
+    with st.sidebar.expander("Latest data refresh"):
+        st.markdown(describe_changes(q1_cube.changes))
+all_countries = q1_cube.countries()
+min_year, max_year = q1_cube.year_range()
 
 # Sidebar filters
 st.sidebar.header("Filters")
-countries = st.sidebar.multiselect("Select Countries", q1_pivot['ref_area'].unique(), default=q1_pivot['ref_area'].unique())
-genders = st.sidebar.multiselect("Select Genders", ['SEX_M', 'SEX_F'], default=['SEX_M','SEX_F'])
-years = st.sidebar.slider("Select Year Range", int(q1_pivot['time'].min()), int(q1_pivot['time'].max()), (2015,2024))
+countries = st.sidebar.multiselect("Select Countries", all_countries,
+                                   default=[c for c in DEFAULT_COUNTRIES if c in all_countries])
+genders = st.sidebar.multiselect("Select Genders", GENDERS, default=GENDERS)
+years = st.sidebar.slider("Select Year Range", min_year, max_year, (max(2015, min_year), min(2024, max_year)))
+min_samples = st.sidebar.number_input("Minimum sample count", min_value=0, value=0, step=10,
+                                      help="Drop country-years surveyed with fewer respondents (ilo_sample_count)")
+
+# Apply filters (index slices on the cube)
+with profiling.stage("select"):
+    filtered_data = q1_cube.select(countries, genders, years, min_samples=min_samples)
+
+# Tabs. By default they are lazy: only the selected tab's body runs on a rerun.
+# DASHBOARD_TABS=eager restores the old behaviour of running every tab.
+tab_names = ["Descriptive Stats", "Trends", "Gender Comparison", "Cross-Country", "Policy Notes"]
+if os.environ.get("DASHBOARD_TABS", "lazy") == "eager":
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(tab_names)
+else:
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(tab_names, key="active_tab", on_change="rerun")
 
-# Apply filters
-filtered_data = q1_pivot[(q1_pivot['ref_area'].isin(countries)) &
-                         (q1_pivot['sex'].isin(genders)) &
-                         (q1_pivot['time'] >= years[0]) & (q1_pivot['time'] <= years[1])]
 
-# Tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["Descriptive Stats", "Trends", "Gender Comparison", "Cross-Country", "Policy Notes"])
+def is_open(tab):
+    # `open` is None when tab state isn't tracked (eager mode), so every tab runs
+    return tab.open is not False
+
+
+# The page slider only reruns this fragment, not the whole script
+@st.fragment
+def trends(filtered_data, genders):
+    pages = facet_pages(sorted(filtered_data['ref_area'].unique()))
+    page = st.select_slider("Page", range(1, len(pages) + 1)) if len(pages) > 1 else 1
+    subset = filtered_data[filtered_data['ref_area'].isin(pages[page - 1])]
+    show_chart("Trends", subset, "small_multiples", sexes=tuple(genders))
+
 
 with tab1:
     st.subheader("Descriptive Statistics")
-    desc_stats = filtered_data.groupby(['ref_area', 'sex']).agg(
-        mean_informality=('informality_rate', 'mean'),
-        median_informality=('informality_rate', 'median'),
-        min_informality=('informality_rate', 'min'),
-        max_informality=('informality_rate', 'max')
-    ).reset_index()
-    st.dataframe(desc_stats)
+    if is_open(tab1):
+        with profiling.stage("section:Descriptive Stats"):
+            tables = metrics_cache.get(filtered_data)
+            st.dataframe(tables['desc_stats'].drop(columns='count_obs'))
+            st.caption("Reliability: summed survey sample, unreliable (U) observations "
+                       "and the sample-weighted mean informality rate")
+            st.dataframe(tables['reliability'])
 
 with tab2:
     st.subheader("Trends by Country")
-    for country in filtered_data['ref_area'].unique():
-        fig, ax = plt.subplots(figsize=(8,5))
-        subset = filtered_data[filtered_data['ref_area'] == country]
-        for gender in genders:
-            gender_data = subset[subset['sex'] == gender]
-            ax.plot(gender_data['time'], gender_data['informality_rate'], marker='o', label=f"{gender}")
-            unreliable = gender_data[q1_filtered['obs_status'] == 'Unreliable']
-            ax.scatter(unreliable['time'], unreliable['informality_rate'], color='red', marker='x', s=100, label=f"{gender} Unreliable")
-        ax.set_title(f"Informality Trends in {country}")
-        ax.set_xlabel("Year")
-        ax.set_ylabel("Informality Rate")
-        ax.legend()
-        st.pyplot(fig)
+    if is_open(tab2):
+        with profiling.stage("section:Trends"):
+            trends(filtered_data, genders)
 
 with tab3:
     st.subheader("Gender Comparison")
-    gender_avg = filtered_data.groupby(['ref_area', 'sex'])['informality_rate'].mean().reset_index()
-    fig, ax = plt.subplots(figsize=(10,6))
-    for country in gender_avg['ref_area'].unique():
-        subset = gender_avg[gender_avg['ref_area'] == country]
-        ax.bar([f"{country}-M", f"{country}-F"], subset['informality_rate'])
-    ax.set_title("Average Informality by Gender")
-    ax.set_ylabel("Mean Informality Rate")
-    st.pyplot(fig)
+    if is_open(tab3):
+        with profiling.stage("section:Gender Comparison"):
+            desc_stats = metrics_cache.get(filtered_data)['desc_stats']
+            gender_avg = desc_stats[['ref_area', 'sex', 'mean_informality']].rename(
+                columns={'mean_informality': 'informality_rate'})
+            show_chart("Gender Comparison", gender_avg, "average_by_gender")
 
 with tab4:
     st.subheader("Cross-Country Comparison")
-    fig, ax = plt.subplots(figsize=(12,6))
-    for country in filtered_data['ref_area'].unique():
-        avg_country = filtered_data[filtered_data['ref_area'] == country].groupby('time')['informality_rate'].mean()
-        ax.plot(avg_country.index, avg_country.values, marker='o', label=country)
-    ax.set_title("Cross-Country Average Informality Rates")
-    ax.set_xlabel("Year")
-    ax.set_ylabel("Mean Informality Rate")
-    ax.legend()
-    st.pyplot(fig)
+    if is_open(tab4):
+        with profiling.stage("section:Cross-Country"):
+            cross_country_avg = metrics_cache.get(filtered_data)['cross_country_avg']
+            show_chart("Cross-Country", cross_country_avg, "cross_country")
 
 with tab5:
     st.subheader("Policy Implications")
@@ -106,3 +111,5 @@ with tab5:
 
     **Source Basis:** Derived from ILO guidelines, ISIC Rev.4 frameworks, and stakeholder notes (MEAA, UNI MEI, CICADA Cambodia, Colombian musician interviews).
     """)
+
+profiling.show_panel(profiling.finish_rerun())
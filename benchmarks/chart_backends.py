@@ -0,0 +1,89 @@
+"""Payload size and server CPU per chart for the matplotlib and Vega-Lite backends.
+
+For every chart of fixed_app.py, on the default countries and on all countries, reports
+the bytes sent to the browser and the server CPU time to produce them. With matplotlib
+each interaction (a different series, zoom range or hover) is a new figure rendered on
+the server; with Vega-Lite the spec is sent once and interactions cost the server nothing.
+
+    python benchmarks/chart_backends.py [--runs 5]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import matplotlib.pyplot as plt  # noqa: E402
+
+import charts  # noqa: E402
+import vega_charts  # noqa: E402
+from cube import CUBE_PREDICATES, DEFAULT_COUNTRIES, load_cube  # noqa: E402
+from facets import facet_pages  # noqa: E402
+from figure_cache import DPI  # noqa: E402
+from metrics import compute_metrics  # noqa: E402
+
+CSV = os.path.join(ROOT, 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv')
+
+
+def chart_inputs(data):
+    tables = compute_metrics(data)
+    first_page = facet_pages(sorted(data['ref_area'].unique()))[0]
+    return {
+        'female_vs_male': tables['female_vs_male'],
+        'gender_gap': tables['gender_gap'],
+        'country_lines': tables['cross_country_avg'],
+        'gender_comparison': tables['mean_by_sex'],
+        'small_multiples': data[data['ref_area'].isin(first_page)],
+        'combined_trends': data,
+    }
+
+
+def png(chart, data):
+    fig = getattr(charts, chart)(data)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def spec(chart, data):
+    return json.dumps(getattr(vega_charts, chart)(data)).encode()
+
+
+def measure(produce, chart, data, runs):
+    cpu = []
+    for _ in range(runs):
+        t0 = time.process_time()
+        payload = produce(chart, data)
+        cpu.append((time.process_time() - t0) * 1000)
+    return len(payload), statistics.median(cpu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    cube = load_cube(CSV, CUBE_PREDICATES)
+    selections = {
+        'default': [c for c in DEFAULT_COUNTRIES if c in cube.countries()],
+        'all': cube.countries(),
+    }
+    print(f"{'countries':<9} {'chart':<18} {'png KiB':>8} {'png cpu ms':>11} "
+          f"{'spec KiB':>9} {'spec cpu ms':>12}")
+    for name, countries in selections.items():
+        for chart, data in chart_inputs(cube.select(countries)).items():
+            png_bytes, png_cpu = measure(png, chart, data, args.runs)
+            spec_bytes, spec_cpu = measure(spec, chart, data, args.runs)
+            print(f"{name:<9} {chart:<18} {png_bytes / 1024:>8.1f} {png_cpu:>11.1f} "
+                  f"{spec_bytes / 1024:>9.1f} {spec_cpu:>12.1f}")
+    print("per later interaction: matplotlib re-renders a figure; vega costs 0 server CPU and 0 bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Time to first paint of each dashboard view in a fresh server process, cold vs pre-warmed.
+
+Each measurement runs in a new Python process, so no module or cache survives from a
+previous one. The process imports Streamlit's AppTest, optionally runs warmup.prewarm()
+as serve.py does on boot (synchronously here, i.e. the server had finished warming
+before the visitor arrived), opens the view and times the session's first complete
+script run. That run ends when every element of the page has been produced, which is
+what a first visitor waits for. The report also shows whether the view imported
+matplotlib.
+
+    python benchmarks/cold_start.py [--repeat 3] [--backend matplotlib|vega]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# (app, section) pairs; section None is app.py's default view
+TEXT_VIEWS = [('fixed_app.py', 'Descriptive Stats'), ('fixed_app.py', 'Summary Findings'),
+              ('fixed_app.py', 'Policy Implications'), ('app.py', None)]
+CHART_VIEWS = [('fixed_app.py', 'Female vs Male %'), ('fixed_app.py', 'Gender Gap Over Time'),
+               ('fixed_app.py', 'Cross-Country Averages'), ('fixed_app.py', 'Trends by Country'),
+               ('fixed_app.py', 'Combined Gender-Country Trends')]
+
+
+def first_paint(app, section, prewarm):
+    """Run in the child process: {'prewarm_ms', 'first_run_ms', 'pyplot'} for one view."""
+    os.chdir(ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    prewarm_ms = 0.0
+    if prewarm:
+        import warmup
+
+        t0 = time.perf_counter()
+        warmup.prewarm()
+        prewarm_ms = (time.perf_counter() - t0) * 1000
+    at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=300)
+    if section is not None:
+        at.session_state['section'] = section
+    t0 = time.perf_counter()
+    at.run()
+    first_run_ms = (time.perf_counter() - t0) * 1000
+    assert not at.exception, at.exception
+    return {'prewarm_ms': prewarm_ms, 'first_run_ms': first_run_ms,
+            'pyplot': 'matplotlib.pyplot' in sys.modules}
+
+
+def measure(app, section, prewarm, backend):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', app, section or '',
+           'prewarm' if prewarm else 'cold']
+    env = dict(os.environ, CHART_BACKEND=backend, DASHBOARD_PREWARM='0')
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--backend', default=os.environ.get('CHART_BACKEND', 'matplotlib'),
+                        choices=['matplotlib', 'vega'])
+    parser.add_argument('--child', nargs=3, metavar=('APP', 'SECTION', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        app, section, mode = args.child
+        print(json.dumps(first_paint(app, section or None, mode == 'prewarm')))
+        return
+
+    print(f"backend {args.backend}, median of {args.repeat} fresh processes per view")
+    print(f"{'view':<48} {'pyplot':>6} {'cold ms':>9} {'warm ms':>9} {'prewarm ms':>11}")
+    by_kind = {'text': ([], []), 'chart': ([], [])}
+    for kind, views in (('text', TEXT_VIEWS), ('chart', CHART_VIEWS)):
+        for app, section in views:
+            cold = [measure(app, section, False, args.backend) for _ in range(args.repeat)]
+            warm = [measure(app, section, True, args.backend) for _ in range(args.repeat)]
+            cold_ms = statistics.median(r['first_run_ms'] for r in cold)
+            warm_ms = statistics.median(r['first_run_ms'] for r in warm)
+            prewarm_ms = statistics.median(r['prewarm_ms'] for r in warm)
+            by_kind[kind][0].append(cold_ms)
+            by_kind[kind][1].append(warm_ms)
+            label = f"{app}: {section or 'default view'}"
+            print(f"{label:<48} {'yes' if cold[0]['pyplot'] else 'no':>6} "
+                  f"{cold_ms:>9.0f} {warm_ms:>9.0f} {prewarm_ms:>11.0f}")
+    for kind, (cold_ms, warm_ms) in by_kind.items():
+        print(f"{'mean, ' + kind + ' views':<48} {'':>6} "
+              f"{statistics.mean(cold_ms):>9.0f} {statistics.mean(warm_ms):>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Concurrent-session load test of the dashboards, headless and in-process.
+
+Runs N AppTest sessions at once in one process, as one Streamlit server would host them.
+Each session follows a seeded interaction script:
+
+- app.py: pick countries, drag the year slider, switch tabs
+- fixed_app.py: pick countries, cycle the sidebar sections
+
+For each N, reports the rerun latency percentiles, the throughput and the memory.
+
+    python benchmarks/load_test.py [--app app.py] [--sessions 1 2 4 8] [--steps 20] [--think 500]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from session_memory import rss_bytes  # noqa: E402
+
+APP_TABS = ["Descriptive Stats", "Trends", "Gender Comparison", "Cross-Country", "Policy Notes"]
+
+# AppTest installs a process-global mock Runtime for the length of each run, so runs
+# from different sessions cannot overlap. Sessions issue their interactions
+# concurrently and queue here. Latency is measured from the moment an interaction is
+# issued, so it includes the wait, as on a server process whose CPU-bound reruns
+# share one GIL.
+_runtime_lock = threading.Lock()
+
+
+def pick_countries(at, rng):
+    options = at.sidebar.multiselect[0].options
+    at.sidebar.multiselect[0].set_value(rng.sample(options, rng.randint(1, min(8, len(options)))))
+
+
+def drag_slider(at, rng):
+    slider = at.sidebar.slider[0]
+    lo, hi = sorted(rng.sample(range(int(slider.min), int(slider.max) + 1), 2))
+    slider.set_value((lo, hi))
+
+
+def next_section(at, rng):
+    radio = at.sidebar.radio[0]
+    options = radio.options
+    radio.set_value(options[(options.index(radio.value) + 1) % len(options)])
+
+
+SCRIPTS = {
+    'app.py': [pick_countries, drag_slider],
+    'fixed_app.py': [pick_countries, next_section, next_section, next_section],
+}
+
+
+def session(app, seed, steps, think):
+    """Run one scripted session; returns its rerun latencies in ms."""
+    rng = random.Random(seed)
+    at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=300)
+    tab = APP_TABS[0]
+    latencies = []
+    for step in range(steps + 1):
+        if step:
+            action = rng.choice(SCRIPTS[app] + ([None] if app == 'app.py' else []))
+            if action is None:
+                tab = rng.choice(APP_TABS)
+            else:
+                action(at, rng)
+        if app == 'app.py':
+            # AppTest resends the tab widget's default on every run, so pin the selection
+            at.session_state['active_tab'] = tab
+        t0 = time.perf_counter()
+        with _runtime_lock:
+            at.run()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(f"{app} session {seed}: {at.exception[0].value}")
+        if think:
+            time.sleep(think / 1000)
+    # The first run opens the session (page load); the rest are interactions
+    return latencies[1:]
+
+
+def load_level(app, n, steps, think, seed):
+    peak = [rss_bytes()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.05):
+            peak[0] = max(peak[0], rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    rss0 = rss_bytes()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        runs = list(pool.map(lambda i: session(app, seed + i, steps, think), range(n)))
+    wall = time.perf_counter() - t0
+    done.set()
+    sampler.join()
+
+    latencies = np.concatenate([np.asarray(r) for r in runs])
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'sessions': n,
+        'reruns': len(latencies),
+        'p50_ms': round(float(p50), 1),
+        'p95_ms': round(float(p95), 1),
+        'p99_ms': round(float(p99), 1),
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'rss_start_mib': round(rss0 / 2**20, 1),
+        'rss_peak_mib': round(max(peak[0], rss_bytes()) / 2**20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', choices=SCRIPTS, nargs='+', default=list(SCRIPTS))
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--steps', type=int, default=20, help='interactions per session')
+    parser.add_argument('--think', type=float, default=500, help='pause between interactions, ms')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    # The apps open the data file relative to their own directory
+    os.chdir(ROOT)
+
+    results = []
+    for app in args.app:
+        # Warm the process-wide cube and caches so the first level isn't penalised
+        session(app, -1, 2, 0)
+    print(f"{'app':<13} {'N':>3} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'rerun/s':>8} {'RSS MiB':>8} {'peak MiB':>9}")
+    for app in args.app:
+        for n in args.sessions:
+            r = dict(load_level(app, n, args.steps, args.think, args.seed), app=app)
+            results.append(r)
+            print(f"{app:<13} {n:>3} {r['reruns']:>7} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                  f"{r['p99_ms']:>8.1f} {r['throughput_rps']:>8.2f} {r['rss_start_mib']:>8.1f} "
+                  f"{r['rss_peak_mib']:>9.1f}", flush=True)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Per-interaction rerun latency of app.py with eager vs lazy tabs.
+
+Drives the app headlessly with Streamlit's AppTest, moves the year slider through
+distinct ranges (so nothing is served from the figure cache) and reports the
+script rerun time for each tab mode and active tab.
+
+    python benchmarks/rerun_latency.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from figure_cache import figure_cache  # noqa: E402
+
+APP = os.path.join(ROOT, 'app.py')
+
+
+def measure(mode, tab, runs):
+    os.environ['DASHBOARD_TABS'] = mode
+    figure_cache.clear()
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    lo, hi = at.sidebar.slider[0].min, at.sidebar.slider[0].max
+    timings = []
+    for i in range(runs):
+        # Distinct ranges so every rerun recomputes and re-renders
+        start = lo + i % max(hi - lo, 1)
+        at.sidebar.slider[0].set_value((start, hi))
+        if mode == 'lazy':
+            # AppTest resends the tab widget's default on every run, so pin the selection
+            at.session_state['active_tab'] = tab
+        t0 = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert not at.exception, at.exception
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    # The app opens the data file relative to its own directory
+    os.chdir(ROOT)
+
+    print(f"{'mode':<6} {'active tab':<18} {'median ms':>10} {'mean ms':>10}")
+    for mode in ('eager', 'lazy'):
+        tabs = ['Descriptive Stats'] if mode == 'eager' else ['Descriptive Stats', 'Trends', 'Policy Notes']
+        for tab in tabs:
+            timings = measure(mode, tab, args.runs)
+            label = 'all (eager)' if mode == 'eager' else tab
+            print(f"{mode:<6} {label:<18} {statistics.median(timings):>10.1f} {statistics.mean(timings):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
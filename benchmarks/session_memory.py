@@ -0,0 +1,73 @@
+"""Resident memory per additional dashboard session.
+
+Opens N AppTest sessions of a dashboard in one process (as one Streamlit server holds
+many sessions), walks each through every section and keeps it alive, then reports how
+much memory each extra session adds on top of the shared cube and caches.
+
+    python benchmarks/session_memory.py [--app fixed_app.py] [--sessions 20]
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Peak RSS only (kilobytes on Linux, bytes on macOS), but better than nothing
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def open_session(app):
+    at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=120)
+    at.run()
+    if at.sidebar.radio:
+        for option in at.sidebar.radio[0].options:
+            at.sidebar.radio[0].set_value(option).run()
+    else:
+        for tab in at.tabs:
+            at.session_state['active_tab'] = tab.label
+            at.run()
+    assert not at.exception, at.exception
+    return at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default='fixed_app.py')
+    parser.add_argument('--sessions', type=int, default=20)
+    args = parser.parse_args()
+
+    # The first sessions pay for the shared cube, figure cache and lazy imports
+    sessions = [open_session(args.app) for _ in range(3)]
+    gc.collect()
+    base = rss_bytes()
+    tracemalloc.start()
+    for _ in range(args.sessions):
+        sessions.append(open_session(args.app))
+    gc.collect()
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    grown = rss_bytes() - base
+
+    print(f"app:                       {args.app}")
+    print(f"RSS after warm-up:         {base / 2**20:.1f} MiB")
+    print(f"RSS growth, {args.sessions} sessions:   {grown / 2**20:.1f} MiB")
+    print(f"RSS per session:           {grown / args.sessions / 2**10:.0f} KiB")
+    # RSS is noisy (the allocator returns freed pages); live Python allocations are not
+    print(f"retained heap per session: {traced / args.sessions / 2**10:.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
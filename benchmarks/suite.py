@@ -0,0 +1,217 @@
+"""Pipeline and section benchmarks on synthetic extracts at 1x-1000x scale.
+
+For each scale, generates (once) a synthetic CSV with benchmarks/synthetic.py and times
+every pipeline stage and every fixed_app.py chart section, recording the best wall
+time over `--repeat` runs and the traced peak memory of one more run. Results are
+written as JSON and, with `--baseline`, compared against a stored run: a stage fails
+when it is slower or hungrier than the baseline by more than the baseline's thresholds.
+
+    python benchmarks/suite.py [--scales 1x 10x 100x] [--baseline benchmarks/baseline.json]
+    python benchmarks/suite.py --save-baseline      # record this machine's baseline
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import matplotlib  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import charts  # noqa: E402
+import cube  # noqa: E402
+import data_loader  # noqa: E402
+from cube import CUBE_PREDICATES, Cube, cube_frame, load_cube, scan  # noqa: E402
+from export import SECTIONS  # noqa: E402
+from facets import FACETS_PER_PAGE  # noqa: E402
+from figure_cache import DPI  # noqa: E402
+from findings import SECTION_LINES, compute_findings, findings_markdown  # noqa: E402
+from metrics import compute_metrics  # noqa: E402
+from snapshot import snapshot_dir, write_snapshot  # noqa: E402
+
+import synthetic  # noqa: E402
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'informality-bench')
+# Charts are drawn for one small-multiples page worth of countries
+RENDER_COUNTRIES = FACETS_PER_PAGE
+
+# Written into a saved baseline; edit there to tighten or loosen the gate
+THRESHOLDS = {
+    'time_ratio': 1.5,          # fail if seconds > baseline * time_ratio + time_slack_s
+    'time_slack_s': 0.005,
+    'memory_ratio': 1.25,       # fail if peak_bytes > baseline * memory_ratio + memory_slack_bytes
+    'memory_slack_bytes': 1 << 20,
+}
+
+
+def stages(path):
+    """(name, fn) pairs; each fn takes and returns the shared context dict."""
+    def cold_load(ctx):
+        # A fresh server process: no cube and no memoised file hash
+        cube.clear_cache()
+        data_loader.clear_cache()
+        ctx['cube'] = load_cube(path, CUBE_PREDICATES)
+
+    def scan_csv(ctx):
+        ctx['grouped'], ctx['fingerprint'] = scan(path, CUBE_PREDICATES)
+
+    def build_cube(ctx):
+        ctx['cube'] = Cube(cube_frame(ctx['grouped']), ctx['fingerprint'])
+
+    def snapshot(ctx):
+        write_snapshot(path)
+
+    def select(ctx):
+        ctx['selection'] = ctx['cube'].select()
+
+    def metrics(ctx):
+        ctx['tables'] = compute_metrics(ctx['selection'])
+
+    def findings(ctx):
+        f = compute_findings(ctx['selection'])
+        for section in SECTION_LINES:
+            findings_markdown(section, f)
+
+    # load_cube runs before the snapshot exists and load_snapshot after, so the first
+    # times the streamed CSV path and the second the memory-mapped one
+    steps = [('scan', scan_csv), ('build_cube', build_cube), ('load_cube', cold_load),
+             ('write_snapshot', snapshot), ('load_snapshot', cold_load), ('select', select),
+             ('metrics', metrics), ('findings', findings)]
+
+    def render(section, table, chart):
+        def run(ctx):
+            countries = ctx['cube'].countries()[:RENDER_COUNTRIES]
+            data = ctx['cube'].select(countries)
+            frame = data if table is None else compute_metrics(data)[table]
+            fig = getattr(charts, chart)(frame)
+            fig.savefig(io.BytesIO(), format='png', dpi=DPI, bbox_inches='tight')
+            plt.close(fig)
+        return run
+
+    steps += [(f'render:{section}', render(section, table, chart))
+              for section, table, chart in SECTIONS if chart is not None]
+    return steps
+
+
+def measure(fn, ctx, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(ctx)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(ctx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': round(best, 6), 'peak_bytes': peak}
+
+
+def run_scale(scale, repeat, data_dir):
+    shape = synthetic.SCALES[scale]
+    path = os.path.join(data_dir, f'synthetic_{scale}.csv')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        synthetic.generate(path + '.tmp', **shape)
+        os.replace(path + '.tmp', path)
+    shutil.rmtree(snapshot_dir(path), ignore_errors=True)
+
+    ctx = {}
+    results = {}
+    for name, fn in stages(path):
+        results[name] = measure(fn, ctx, repeat)
+        print(f"  {name:<42} {results[name]['seconds'] * 1000:>10.1f} ms "
+              f"{results[name]['peak_bytes'] / 2**20:>9.1f} MiB", flush=True)
+    return {
+        'shape': shape,
+        'rows': len(ctx['fingerprint']),
+        'cells': len(ctx['cube'].flat),
+        'file_bytes': os.path.getsize(path),
+        'stages': results,
+    }
+
+
+def machine():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def regressions(results, baseline):
+    """Stages slower or larger than the baseline beyond its thresholds, as readable lines."""
+    limits = dict(THRESHOLDS, **baseline.get('thresholds', {}))
+    found = []
+    for scale, run in results['scales'].items():
+        base_stages = baseline['scales'].get(scale, {}).get('stages', {})
+        for name, now in run['stages'].items():
+            base = base_stages.get(name)
+            if base is None:
+                continue
+            max_s = base['seconds'] * limits['time_ratio'] + limits['time_slack_s']
+            max_b = base['peak_bytes'] * limits['memory_ratio'] + limits['memory_slack_bytes']
+            if now['seconds'] > max_s:
+                found.append(f"{scale} {name}: {now['seconds'] * 1000:.1f} ms > {max_s * 1000:.1f} ms")
+            if now['peak_bytes'] > max_b:
+                found.append(f"{scale} {name}: {now['peak_bytes'] / 2**20:.1f} MiB > {max_b / 2**20:.1f} MiB")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=synthetic.SCALES, default=['1x', '10x', '100x'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--out', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='compare against this results file and exit 1 on regressions')
+    parser.add_argument('--save-baseline', action='store_true', help=f'also write the results to {BASELINE}')
+    args = parser.parse_args()
+
+    results = {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'machine': machine(),
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for scale in args.scales:
+        print(f"{scale}:", flush=True)
+        results['scales'][scale] = run_scale(scale, args.repeat, args.data_dir)
+    # Peak RSS of the whole run (kilobytes on Linux, bytes on macOS)
+    scale = 1 if sys.platform == 'darwin' else 1024
+    results['max_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=1)
+    if args.save_baseline:
+        with open(BASELINE, 'w') as f:
+            json.dump(dict(results, thresholds=THRESHOLDS), f, indent=1)
+    print(f"wrote {args.out}; peak RSS {results['max_rss_bytes'] / 2**20:.0f} MiB")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f))
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == '__main__':
+    main()
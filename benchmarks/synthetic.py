@@ -0,0 +1,170 @@
+"""Synthetic ILOSTAT extracts with the exact schema of EMP_TEM2_SEX_EC4_IFL_NB_A.csv.
+
+Every observed (country, year) gets the full sex x classif1 x classif2 grid, with totals
+that add up (SEX_T = M + F, EC4_MEDIAISIC_TOTAL = sum of the other classif1 codes,
+IFL_NATURE_TOTAL = formal + informal) and an informality rate that drifts per country
+and sex. Countries beyond the real code list get synthetic three-letter codes; classif1
+codes beyond YES/NO get EC4_MEDIAISIC_X01, X02, ...
+
+    python benchmarks/synthetic.py out.csv [--scale 10x] [--countries N --years N --classif1 N]
+"""
+import argparse
+import csv
+import itertools
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLUMNS = [
+    'ref_area', 'ref_area.label', 'source', 'source.label', 'indicator', 'indicator.label',
+    'sex', 'sex.label', 'classif1', 'classif1.label', 'classif2', 'classif2.label', 'time',
+    'obs_value', 'obs_status', 'obs_status.label', 'note_classif.label', 'note_indicator.label',
+    'note_source.label', 'ilo_sample_count', 'ACRO', 'freq_code', 'latest_period', 'best_source',
+    'MAPPING',
+]
+INDICATOR = ('EMP_TEM2_SEX_EC4_IFL_NB',
+             'Employment by sex, economic activity ISIC4 and formal vs informal employment '
+             '(Thousands), aggregate')
+SEXES = [('SEX_T', 'Sex: Total'), ('SEX_M', 'Sex: Male'), ('SEX_F', 'Sex: Female')]
+CLASSIF2 = [('IFL_NATURE_TOTAL', 'Nature of job: Total'),
+            ('IFL_NATURE_FORMAL', 'Nature of job: Persons with formal main job'),
+            ('IFL_NATURE_INFORMAL', 'Nature of job: Persons with informal main job')]
+STATUS = [(None, None), ('B', 'Break in series'), ('U', 'Unreliable')]
+STATUS_P = [0.76, 0.13, 0.11]
+NOTE = 'Repository: ILO-STATISTICS - Micro data processing | Age coverage - minimum age: 15 years old'
+
+# Presets sized to roughly 1x, 10x, 100x and 1000x the rows of the real extract
+SCALES = {
+    '1x': dict(countries=63, years=15, classif1=3),
+    '10x': dict(countries=190, years=30, classif1=5),
+    '100x': dict(countries=500, years=40, classif1=14),
+    '1000x': dict(countries=2000, years=50, classif1=28),
+}
+# Share of (country, year) pairs with a survey, as in the real extract
+COVERAGE = 0.25
+FIRST_YEAR = 2010
+COUNTRIES_PER_CHUNK = 50
+# A quoted empty field (QUOTE_NONNUMERIC writes missing values as "")
+EMPTY = re.compile(r'(?<=,)""(?=,|\r?\n)')
+
+
+def country_codes(n):
+    real = pd.read_csv(os.path.join(ROOT, 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv'),
+                       usecols=['ref_area', 'ref_area.label']).drop_duplicates('ref_area')
+    codes = list(zip(real['ref_area'], real['ref_area.label']))
+    taken = set(real['ref_area'])
+    for letters in itertools.product('ZYXWVUTSRQ', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'):
+        if len(codes) >= n:
+            break
+        code = ''.join(letters)
+        if code not in taken:
+            codes.append((code, f'Synthetic {code}'))
+    return codes[:n]
+
+
+def classif1_codes(n):
+    codes = ['EC4_MEDIAISIC_TOTAL', 'EC4_MEDIAISIC_YES', 'EC4_MEDIAISIC_NO']
+    codes += [f'EC4_MEDIAISIC_X{i:02d}' for i in range(1, n - 2)]
+    return codes[:max(n, 2)]
+
+
+def _chunk(rng, countries, years, classif1):
+    """Rows for one batch of countries, as a frame with COLUMNS."""
+    n_parts = len(classif1) - 1   # TOTAL is the sum of the rest
+    observed = rng.random((len(countries), years)) < COVERAGE
+    observed[np.arange(len(countries)), rng.integers(0, years, len(countries))] = True
+    c_idx, y_idx = np.nonzero(observed)
+    cells = len(c_idx)
+
+    # Employment (thousands) per cell, sex (M, F) and non-total classif1 code
+    size = rng.lognormal(6, 1.5, len(countries))[c_idx]
+    shares = rng.dirichlet(np.ones(n_parts), cells)
+    emp = size[:, None, None] * np.stack([shares * 0.55, shares * 0.45], axis=1)
+    # Informality rate: country level plus a per-sex offset and a slow drift over time
+    base = rng.beta(2, 2, len(countries))
+    offset = rng.normal(0, 0.08, (len(countries), 2))
+    drift = rng.normal(-0.005, 0.004, len(countries))
+    rate = base[c_idx, None] + offset[c_idx] + (drift[c_idx] * y_idx)[:, None]
+    rate = np.clip(rate[:, :, None] + rng.normal(0, 0.02, emp.shape), 0.01, 0.99)
+    informal = emp * rate
+
+    # Add totals: sex axis becomes (T, M, F), classif1 axis becomes (TOTAL, codes...)
+    emp = np.concatenate([emp.sum(axis=1, keepdims=True), emp], axis=1)
+    informal = np.concatenate([informal.sum(axis=1, keepdims=True), informal], axis=1)
+    emp = np.concatenate([emp.sum(axis=2, keepdims=True), emp], axis=2)
+    informal = np.concatenate([informal.sum(axis=2, keepdims=True), informal], axis=2)
+    values = np.stack([emp, emp - informal, informal], axis=3)   # classif2: TOTAL, FORMAL, INFORMAL
+
+    shape = values.shape   # (cells, sex, classif1, classif2)
+    cell, sex, c1, c2 = (a.ravel() for a in np.indices(shape))
+    n = len(cell)
+    country = c_idx[cell]
+    status = rng.choice(len(STATUS), n, p=STATUS_P)
+    codes = np.array([c for c, _ in countries], dtype=object)[country]
+    labels = np.array([label for _, label in countries], dtype=object)[country]
+    source_ids = np.array([f'BA:{100 + i}' for i in range(len(countries))], dtype=object)
+    obs = values.ravel()
+    return pd.DataFrame({
+        'ref_area': codes,
+        'ref_area.label': labels,
+        'source': source_ids[country],
+        'source.label': codes + ' - LFS - Labour Force Survey',
+        'indicator': INDICATOR[0],
+        'indicator.label': INDICATOR[1],
+        'sex': np.array([s for s, _ in SEXES], dtype=object)[sex],
+        'sex.label': np.array([label for _, label in SEXES], dtype=object)[sex],
+        'classif1': np.array(classif1, dtype=object)[c1],
+        'classif1.label': np.array(classif1, dtype=object)[c1],
+        'classif2': np.array([c for c, _ in CLASSIF2], dtype=object)[c2],
+        'classif2.label': np.array([label for _, label in CLASSIF2], dtype=object)[c2],
+        'time': (FIRST_YEAR + y_idx[cell]).astype(str),
+        'obs_value': obs,
+        'obs_status': np.array([s for s, _ in STATUS], dtype=object)[status],
+        'obs_status.label': np.array([label for _, label in STATUS], dtype=object)[status],
+        'note_classif.label': None,
+        'note_indicator.label': None,
+        'note_source.label': NOTE,
+        'ilo_sample_count': np.maximum(1, (obs * rng.uniform(0.5, 2.0, n)).round()).astype(np.int64),
+        'ACRO': 'LFS',
+        'freq_code': 'm',
+        'latest_period': pd.array([None] * n, dtype='Int64'),
+        'best_source': pd.array(np.where(rng.random(n) < 0.9, 1, None), dtype='Int64'),
+        'MAPPING': None,
+    }, columns=COLUMNS)
+
+
+def generate(path, countries=63, years=15, classif1=3, seed=0):
+    """Write a synthetic extract to `path` and return its row count."""
+    rng = np.random.default_rng(seed)
+    codes = country_codes(countries)
+    c1 = classif1_codes(classif1)
+    rows = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        for i in range(0, len(codes), COUNTRIES_PER_CHUNK):
+            chunk = _chunk(rng, codes[i:i + COUNTRIES_PER_CHUNK], years, c1)
+            # Strings quoted, numbers and empty fields bare, like the ILOSTAT export
+            text = chunk.to_csv(index=False, header=(i == 0), quoting=csv.QUOTE_NONNUMERIC)
+            f.write(EMPTY.sub('', text))
+            rows += len(chunk)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out')
+    parser.add_argument('--scale', choices=SCALES, default='1x')
+    parser.add_argument('--countries', type=int)
+    parser.add_argument('--years', type=int)
+    parser.add_argument('--classif1', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    shape = dict(SCALES[args.scale])
+    shape.update({k: getattr(args, k) for k in shape if getattr(args, k) is not None})
+    rows = generate(args.out, seed=args.seed, **shape)
+    print(f"wrote {rows:,} rows to {args.out} ({os.path.getsize(args.out) / 2**20:.1f} MiB)", file=sys.stderr)
@@ -0,0 +1,26 @@
+import os
+
+import streamlit as st
+
+import profiling
+import vega_charts
+from figure_cache import figure_cache
+
+# Per-deployment chart backend:
+#   matplotlib  figures are rasterised on the server and cached as images (default)
+#   vega        Vega-Lite specs with the data embedded; rendered and explored in the browser
+CHART_BACKEND = os.environ.get('CHART_BACKEND', 'matplotlib')
+BACKENDS = ('matplotlib', 'vega')
+if CHART_BACKEND not in BACKENDS:
+    raise ValueError(f"CHART_BACKEND must be one of {BACKENDS}, got {CHART_BACKEND!r}")
+
+
+def show_chart(section, data, chart, **style):
+    """Draw `chart` (a function name shared by charts.py and vega_charts.py) for `data`."""
+    with profiling.stage(f'render:{section}'):
+        if CHART_BACKEND == 'vega':
+            st.vega_lite_chart(spec=getattr(vega_charts, chart)(data, **style))
+        else:
+            # matplotlib is imported by the first chart drawn, not when the app starts
+            import charts
+            st.image(figure_cache.render(section, data, getattr(charts, chart), **style))
@@ -0,0 +1,195 @@
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+from cube import UNRELIABLE
+
+# Drawing functions for the dashboard sections. Each takes the frame the section
+# computed plus style keywords and returns a Figure; rendering and caching is done
+# by figure_cache.FigureCache.
+
+
+# -------- fixed_app.py --------
+def female_vs_male(pivot_gender, figsize=(10, 6)):
+    fig, ax = plt.subplots(figsize=figsize)
+    yerr = None
+    if 'ratio_lo' in pivot_gender.columns:
+        # Sampling interval of each ratio (see uncertainty.py), as distances from the bar
+        pct = pivot_gender['female_vs_male_pct']
+        yerr = [(pct - pivot_gender['ratio_lo']).clip(lower=0), (pivot_gender['ratio_hi'] - pct).clip(lower=0)]
+    bars = ax.bar(pivot_gender['ref_area'], pivot_gender['female_vs_male_pct'], color='skyblue',
+                  yerr=yerr, capsize=4, ecolor='dimgray')
+    ax.axhline(100, color='red', linestyle='--')
+    for bar in bars:
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
+                f'{bar.get_height():.1f}%', ha='center', va='bottom')
+    return fig
+
+
+def gender_gap(gender_gap, figsize=(12, 6)):
+    fig, ax = plt.subplots(figsize=figsize)
+    for country in gender_gap['ref_area'].unique():
+        subset = gender_gap[gender_gap['ref_area'] == country]
+        line, = ax.plot(subset['time'], subset['gender_gap'], marker='o', label=country)
+        if 'gap_lo' in subset.columns:
+            ax.fill_between(subset['time'], subset['gap_lo'], subset['gap_hi'],
+                            color=line.get_color(), alpha=0.15, linewidth=0)
+    ax.axhline(0, color='black', linestyle='--')
+    return fig
+
+
+def country_lines(cross_country_avg, figsize=(12, 6), series='ref_area'):
+    fig, ax = plt.subplots(figsize=figsize)
+    for country in cross_country_avg[series].unique():
+        subset = cross_country_avg[cross_country_avg[series] == country]
+        ax.plot(subset['time'], subset['informality_rate'], marker='o', label=country)
+    ax.legend()
+    return fig
+
+
+def gender_comparison(pivot_gender, figsize=(12, 6), bar_width=0.35):
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.bar(pivot_gender.index - bar_width/2, pivot_gender['SEX_M'], width=bar_width, label='Male')
+    ax.bar(pivot_gender.index + bar_width/2, pivot_gender['SEX_F'], width=bar_width, label='Female')
+    ax.set_xticks(pivot_gender.index)
+    ax.set_xticklabels(pivot_gender['ref_area'])
+    ax.legend()
+    return fig
+
+
+def combined_trends(filtered_data, figsize=(12, 6)):
+    fig, ax = plt.subplots(figsize=figsize)
+    for country in filtered_data['ref_area'].unique():
+        subset = filtered_data[filtered_data['ref_area'] == country]
+        for gender in subset['sex'].unique():
+            gender_data = subset[subset['sex'] == gender]
+            ax.plot(gender_data['time'], gender_data['informality_rate'], marker='o', label=f"{country}-{gender}")
+    ax.legend()
+    return fig
+
+
+# -------- app.py --------
+def average_by_gender(gender_avg, figsize=(10, 6)):
+    fig, ax = plt.subplots(figsize=figsize)
+    for country in gender_avg['ref_area'].unique():
+        subset = gender_avg[gender_avg['ref_area'] == country]
+        ax.bar([f"{country}-M", f"{country}-F"], subset['informality_rate'])
+    ax.set_title("Average Informality by Gender")
+    ax.set_ylabel("Mean Informality Rate")
+    return fig
+
+
+def cross_country(cross_country_avg, figsize=(12, 6)):
+    fig, ax = plt.subplots(figsize=figsize)
+    for country in cross_country_avg['ref_area'].unique():
+        subset = cross_country_avg[cross_country_avg['ref_area'] == country]
+        ax.plot(subset['time'], subset['informality_rate'], marker='o', label=country)
+    ax.set_title("Cross-Country Average Informality Rates")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Mean Informality Rate")
+    ax.legend()
+    return fig
+
+
+# -------- small multiples --------
+SEX_COLORS = {'SEX_M': 'C0', 'SEX_F': 'C1'}
+FACET_GAP = 0.3
+
+
+def small_multiples(data, sexes=('SEX_M', 'SEX_F'), ncols=4, panel_size=(3.0, 2.2)):
+    """Draw one trend panel per country into a single shared-axis grid.
+
+    All panels live in one Axes: each country gets a unit cell (years scaled to [0, 1]
+    horizontally, informality rate on [0, 1] vertically), and each sex is drawn as one
+    LineCollection plus one scatter across every country, so the number of artists does
+    not grow with the number of countries.
+    """
+    data = data[data['sex'].isin(sexes)]
+    countries = sorted(data['ref_area'].unique())
+    n = max(len(countries), 1)
+    ncols = min(ncols, n)
+    nrows = -(-n // ncols)
+    stride = 1 + FACET_GAP
+
+    fig, ax = plt.subplots(figsize=(panel_size[0] * ncols, panel_size[1] * nrows))
+    if data.empty:
+        ax.set_axis_off()
+        return fig
+
+    y0, y1 = int(data['time'].min()), int(data['time'].max())
+    span = max(y1 - y0, 1)
+    cell = {country: i for i, country in enumerate(countries)}
+
+    # Panel frames and a dashed 0.5 reference line, one collection each
+    origins = np.array([((i % ncols) * stride, (nrows - 1 - i // ncols) * stride) for i in range(len(countries))])
+    boxes = [np.array([[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]) for x, y in origins]
+    ax.add_collection(LineCollection(boxes, colors='0.7', linewidths=0.8))
+    ax.add_collection(LineCollection([[(x, y + 0.5), (x + 1, y + 0.5)] for x, y in origins],
+                                     colors='0.85', linewidths=0.6, linestyles='--'))
+
+    # Group once: order rows by (country, sex, time) and split at group boundaries
+    order = np.lexsort((data['time'].to_numpy(), data['sex'].to_numpy(), data['ref_area'].to_numpy()))
+    area = data['ref_area'].to_numpy()[order]
+    sex = data['sex'].to_numpy()[order]
+    idx = np.array([cell[a] for a in area])
+    xs = origins[idx, 0] + (data['time'].to_numpy()[order] - y0) / span
+    ys = origins[idx, 1] + np.clip(data['informality_rate'].to_numpy()[order], 0, 1)
+    points = np.column_stack([xs, ys])
+    breaks = np.flatnonzero((area[1:] != area[:-1]) | (sex[1:] != sex[:-1])) + 1
+    starts = np.r_[0, breaks]
+
+    handles = []
+    for gender in sexes:
+        color = SEX_COLORS.get(gender)
+        groups = [g for g, s in zip(np.split(points, breaks), starts) if sex[s] == gender]
+        if not groups:
+            continue
+        ax.add_collection(LineCollection(groups, colors=color, linewidths=1.5))
+        mask = sex == gender
+        ax.scatter(xs[mask], ys[mask], s=10, color=color)
+        handles.append(Line2D([], [], color=color, marker='o', markersize=4, label=gender))
+
+    # Cells with an unreliable (U) component, one scatter across every panel
+    if 'status' in data.columns:
+        flagged = (data['status'].to_numpy()[order] & UNRELIABLE) != 0
+        if flagged.any():
+            ax.scatter(xs[flagged], ys[flagged], s=40, color='red', marker='x', linewidths=1)
+            handles.append(Line2D([], [], color='red', marker='x', linestyle='', label='Unreliable'))
+
+    for country, (x, y) in zip(countries, origins):
+        ax.text(x + 0.5, y + 1.02, country, ha='center', va='bottom', fontsize=9)
+
+    # Shared scales: rate ticks on the left column, year ticks on the bottom row
+    rows = sorted({y for _, y in origins})
+    ax.set_yticks([y + t for y in rows for t in (0, 0.5, 1)])
+    ax.set_yticklabels(['0', '0.5', '1'] * len(rows), fontsize=7)
+    cols = sorted({x for x, _ in origins})
+    ax.set_xticks([x + t for x in cols for t in (0, 1)])
+    ax.set_xticklabels([str(y0), str(y1)] * len(cols), fontsize=7)
+    ax.set_xlim(-0.05, (ncols - 1) * stride + 1.05)
+    ax.set_ylim(-0.05, (nrows - 1) * stride + 1.15)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Informality Rate")
+    ax.legend(handles=handles, title="Gender", loc='upper left', bbox_to_anchor=(1.0, 1.0))
+    return fig
+
+
+# -------- joined indicators --------
+def indicator_scatter(joined, x, y, x_label=None, y_label=None, figsize=(10, 6)):
+    """One point per country, year and sex of two indicators from `indicators.view`."""
+    fig, ax = plt.subplots(figsize=figsize)
+    for gender, color in SEX_COLORS.items():
+        subset = joined[joined['sex'] == gender]
+        if not subset.empty:
+            ax.scatter(subset[x], subset[y], s=18, color=color, alpha=0.7, label=gender)
+    ax.set_xlabel(x_label or x)
+    ax.set_ylabel(y_label or y)
+    if len(ax.collections):
+        ax.legend(title="Gender")
+    return fig
@@ -0,0 +1,347 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from data_loader import DTYPES, USECOLS, file_fingerprint, is_hashed, iter_chunks
+
+FORMAL = 'IFL_NATURE_FORMAL'
+INFORMAL = 'IFL_NATURE_INFORMAL'
+CREATIVE = 'EC4_MEDIAISIC_YES'
+GENDERS = ['SEX_M', 'SEX_F']
+INDICATOR = 'EMP_TEM2_SEX_EC4_IFL_NB'
+
+# Rows the dashboards' cube is built from, pushed down into the chunked read. Every
+# in-process caller passes these, so they share one cached cube (and the snapshot);
+# `indicator` keeps sibling indicators out when pointed at a combined bulk file.
+CUBE_PREDICATES = {'indicator': [INDICATOR], 'classif2': [FORMAL, INFORMAL], 'sex': GENDERS}
+
+# Countries the dashboards focus on by default
+DEFAULT_COUNTRIES = ['GBR', 'FRA', 'BRA', 'ARG', 'KHM', 'COL']
+
+CUBE_INDEX = ['classif1', 'ref_area', 'time', 'sex']
+CUBE_COLUMNS = ['formal', 'informal', 'total', 'informality_rate', 'n_obs', 'status', 'sample_count']
+# Full key of one input row
+ROW_KEY = ['ref_area', 'source', 'sex', 'classif1', 'classif2', 'time']
+# Columns whose revision changes a row
+VALUE_COLS = ['obs_value', 'obs_status', 'ilo_sample_count']
+
+# Bits of a cell's `status`, ORed over its formal and informal source rows
+UNRELIABLE = 1  # obs_status U
+BREAK = 2       # obs_status B (break in series)
+STATUS_BITS = {'U': UNRELIABLE, 'B': BREAK}
+BIT_COLS = [f'bit{bit}' for bit in STATUS_BITS.values()]
+
+# Cubes are shared by every session in the process. Copy-on-write (always on from
+# pandas 3) makes frames derived from them copy before writing, never write through.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Process-wide cache: {file fingerprint + predicates: Cube}
+_cubes = {}
+_lock = threading.Lock()
+_refresh_listeners = []
+
+
+def status_bits(obs_status):
+    """Per-row status bits for a column of ILOSTAT obs_status codes."""
+    return obs_status.astype(object).map(STATUS_BITS).fillna(0).astype('uint8')
+
+
+def predicate_key(predicates):
+    """Canonical string for a predicate dict, for cache keys and snapshot metadata."""
+    return repr(sorted((col, sorted(values)) for col, values in (predicates or {}).items()))
+
+
+def is_unreliable(data):
+    """Boolean array marking rows of a cube selection with an unreliable (U) component."""
+    return (data['status'].to_numpy() & UNRELIABLE) != 0
+
+
+def aggregate(rows):
+    """Per (classif1, ref_area, time, sex, classif2): sum and count of `obs_value`,
+    summed `ilo_sample_count` and, per status bit, whether any row has it.
+
+    Aggregates of disjoint sets of rows merge with `combine`.
+    """
+    rows = rows[rows['classif2'].isin([FORMAL, INFORMAL])]
+    bits = status_bits(rows['obs_status'])
+    rows = rows.assign(**{col: bits & bit for col, bit in zip(BIT_COLS, STATUS_BITS.values())})
+    return rows.groupby(CUBE_INDEX + ['classif2'], observed=True).agg(
+        sum=('obs_value', 'sum'),
+        count=('obs_value', 'count'),
+        samples=('ilo_sample_count', 'sum'),
+        **{col: (col, 'max') for col in BIT_COLS},
+    )
+
+
+def combine(parts):
+    """Merge partial aggregates (from `aggregate`) of disjoint sets of rows."""
+    if len(parts) == 1:
+        return parts[0]
+    merged = pd.concat(parts)
+    return merged.groupby(level=list(range(merged.index.nlevels))).agg(
+        {'sum': 'sum', 'count': 'sum', 'samples': 'sum', **{col: 'max' for col in BIT_COLS}})
+
+
+def cube_frame(grouped):
+    """Turn aggregated rows into the cube table."""
+    # Bits are disjoint, so the sum of the per-bit maxima is their OR
+    grouped = grouped.assign(status=grouped[BIT_COLS].sum(axis=1).astype('uint8'))
+    sums = grouped['sum'].unstack('classif2')
+    counts = grouped['count'].unstack('classif2', fill_value=0)
+    status = grouped['status'].unstack('classif2', fill_value=0)
+
+    frame = pd.DataFrame(index=sums.index)
+    frame['formal'] = sums.get(FORMAL)
+    frame['informal'] = sums.get(INFORMAL)
+    frame['total'] = frame['formal'] + frame['informal']
+    frame['informality_rate'] = frame['informal'] / frame['total']
+    frame['n_obs'] = counts.sum(axis=1).astype('int32')
+    frame['status'] = np.bitwise_or.reduce(status.to_numpy(), axis=1).astype('uint8')
+    frame['sample_count'] = grouped['samples'].unstack('classif2').sum(axis=1).astype('int64')
+
+    # Plain string levels keep label lookups independent of the categorical dtype
+    frame = frame.reset_index()
+    frame = frame.astype({col: str for col in CUBE_INDEX if col != 'time'})
+    frame['time'] = frame['time'].astype('int64')
+    return frame.set_index(CUBE_INDEX).sort_index()
+
+
+def hash_rows(frame, cols):
+    """uint64 hash of `cols` per row; the same for categorical, string and object columns."""
+    return pd.util.hash_pandas_object(frame[cols], index=False).to_numpy()
+
+
+def row_fingerprint(rows):
+    """Fingerprint of the cube's formal/informal input rows, indexed by a hash of ROW_KEY.
+
+    Each row keeps two uint64 hashes: `value` of its obs_value, obs_status and
+    ilo_sample_count, and `cell` of the cube cell it feeds. A later extract is diffed
+    against this, at 24 bytes per row whatever the width of the file.
+    """
+    rows = rows[rows['classif2'].isin([FORMAL, INFORMAL])]
+    return pd.DataFrame({'value': hash_rows(rows, VALUE_COLS), 'cell': hash_rows(rows, CUBE_INDEX)},
+                        index=pd.Index(hash_rows(rows, ROW_KEY), name='key'))
+
+
+def merge_fingerprints(parts):
+    """One fingerprint from per-chunk ones; a key repeated later in the file wins."""
+    fp = pd.concat(parts) if len(parts) > 1 else parts[0]
+    return fp[~fp.index.duplicated(keep='last')].sort_index()
+
+
+def scan(path, predicates=None, progress=None):
+    """Aggregated cells (see `aggregate`) and row fingerprint of `path`.
+
+    The file is read in chunks, and each chunk is filtered by `predicates` and reduced to
+    partial sums and row hashes before the next one is read. Memory is bounded by the chunk
+    size plus the number of cube cells and the fingerprint.
+    """
+    grouped, fingerprints = None, []
+    for chunk in iter_chunks(path, predicates, progress=progress):
+        part = aggregate(chunk)
+        grouped = part if grouped is None else combine([grouped, part])
+        fingerprints.append(row_fingerprint(chunk))
+    if grouped is None:
+        empty = pd.DataFrame({col: pd.Series(dtype=DTYPES[col]) for col in USECOLS})
+        grouped, fingerprints = aggregate(empty), [row_fingerprint(empty)]
+    return grouped, merge_fingerprints(fingerprints)
+
+
+def diff_rows(old, new):
+    """Row key hashes inserted, changed (value, sample count or status) and deleted between two fingerprints."""
+    inserted = new.index.difference(old.index)
+    deleted = old.index.difference(new.index)
+    common = old.index.intersection(new.index)
+    changed = common[old.loc[common, 'value'].to_numpy() != new.loc[common, 'value'].to_numpy()]
+    return inserted, changed, deleted
+
+
+def refresh_cube(cube, grouped, fingerprint):
+    """Apply a new extract to `cube`, recomputing only the cells whose input rows changed.
+
+    `grouped` and `fingerprint` are the new extract's `scan`. Returns a new Cube whose
+    `changes` summarises the inserted/changed/deleted rows and the affected countries and years.
+    """
+    inserted, changed, deleted = diff_rows(cube.fingerprint, fingerprint)
+    touched = np.union1d(fingerprint.loc[inserted.append(changed), 'cell'].to_numpy(),
+                         cube.fingerprint.loc[deleted, 'cell'].to_numpy())
+
+    dropped = np.isin(hash_rows(cube.flat, CUBE_INDEX), touched)
+    cells = grouped.index.droplevel('classif2').to_frame(index=False)
+    in_cells = np.isin(hash_rows(cells, CUBE_INDEX), touched)
+    recomputed = cube_frame(grouped[in_cells]) if in_cells.any() else None
+    frame = cube.frame[~dropped]
+    if recomputed is not None:
+        frame = pd.concat([frame, recomputed]).sort_index()
+
+    affected = cube.flat.loc[dropped, ['ref_area', 'time']]
+    if recomputed is not None:
+        affected = pd.concat([affected, recomputed.index.to_frame(index=False)[['ref_area', 'time']]])
+    changes = {
+        'inserted': len(inserted),
+        'changed': len(changed),
+        'deleted': len(deleted),
+        'countries': sorted(set(affected['ref_area'])),
+        'years': sorted(int(t) for t in set(affected['time'])),
+    }
+    return Cube(frame, fingerprint, changes)
+
+
+def describe_changes(changes):
+    """Markdown summary of a refresh for the dashboards."""
+    if not changes['countries']:
+        return "No changes to formal/informal counts in the latest extract."
+    return (
+        f"**{changes['inserted']}** rows added, **{changes['changed']}** revised, "
+        f"**{changes['deleted']}** removed.  \n"
+        f"Countries affected: {', '.join(changes['countries'])}  \n"
+        f"Years affected: {', '.join(str(t) for t in changes['years'])}"
+    )
+
+
+def on_refresh(listener):
+    """Register `listener(changes)` to run after a cube is refreshed in place of a rebuild."""
+    if listener not in _refresh_listeners:
+        _refresh_listeners.append(listener)
+
+
+def _read_only(array):
+    array = array.view()
+    array.flags.writeable = False
+    return array
+
+
+class Cube:
+    """Materialized informality cube over (classif1, ref_area, time, sex).
+
+    `frame` is indexed by the sorted MultiIndex; `flat` holds the same rows as plain columns.
+    Rows of one (classif1, ref_area) pair are contiguous and sorted by time, so selections
+    resolve to position ranges instead of boolean scans over the whole table.
+    One Cube per file version is shared by every session in the process; sessions only
+    hold their filter selection and the small frames `select` returns. The cube's arrays
+    are read-only and its frames must not be mutated.
+    A cube may be given `flat` instead of `frame` (see snapshot.py); `frame` is then
+    built from it on first use.
+    """
+
+    def __init__(self, frame, fingerprint=None, changes=None, flat=None):
+        self._frame = frame
+        # Row-level snapshot the cube was built from, and what changed since the previous one
+        self.fingerprint = fingerprint
+        self.changes = changes
+        self.flat = frame.reset_index() if flat is None else flat
+        self._time = _read_only(self.flat['time'].to_numpy())
+        # Integer codes rather than per-row string objects, for the sex filter and the blocks below
+        sex, self._sex_labels = pd.factorize(self.flat['sex'])
+        self._sex = _read_only(sex)
+        self._samples = _read_only(self.flat['sample_count'].to_numpy())
+        self._rows = self.flat.drop(columns='classif1')
+
+        c1, c1_labels = pd.factorize(self.flat['classif1'])
+        area, area_labels = pd.factorize(self.flat['ref_area'])
+        starts = np.flatnonzero(np.r_[True, (c1[1:] != c1[:-1]) | (area[1:] != area[:-1])]) if len(c1) else []
+        stops = list(starts[1:]) + [len(c1)]
+        # {(classif1, ref_area): (start, stop)}
+        self.blocks = {(c1_labels[c1[a]], area_labels[area[a]]): (a, b) for a, b in zip(starts, stops)}
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self._frame = self.flat.set_index(CUBE_INDEX)
+        return self._frame
+
+    def countries(self, classif1=CREATIVE):
+        return sorted(area for c1, area in self.blocks if c1 == classif1)
+
+    def year_range(self, classif1=CREATIVE):
+        spans = [(self._time[a], self._time[b - 1]) for (c1, _), (a, b) in self.blocks.items() if c1 == classif1]
+        return int(min(s[0] for s in spans)), int(max(s[1] for s in spans))
+
+    def positions(self, countries=None, sexes=GENDERS, years=None, classif1=CREATIVE, min_samples=None):
+        """Row positions in `flat` for the selection; `None` means no restriction.
+
+        `min_samples` drops cells whose summed `ilo_sample_count` is below it.
+        """
+        if countries is None:
+            countries = self.countries(classif1)
+        ranges = []
+        for country in sorted(set(countries)):
+            block = self.blocks.get((classif1, country))
+            if block is None:
+                continue
+            a, b = block
+            if years is not None:
+                lo, hi = np.searchsorted(self._time[a:b], [years[0], years[1] + 1])
+                a, b = a + lo, a + hi
+            if a < b:
+                ranges.append(np.arange(a, b))
+        pos = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.intp)
+        if sexes is not None:
+            codes = self._sex_labels.get_indexer(list(sexes))
+            pos = pos[np.isin(self._sex[pos], codes[codes >= 0])]
+        if min_samples:
+            pos = pos[self._samples[pos] >= min_samples]
+        return pos
+
+    def select(self, countries=None, sexes=GENDERS, years=None, classif1=CREATIVE, min_samples=None):
+        """Flat frame for the selection, shaped like the old `q1_pivot`."""
+        pos = self.positions(countries, sexes, years, classif1, min_samples)
+        return self._rows.take(pos).reset_index(drop=True)
+
+
+def clear_cache():
+    with _lock:
+        _cubes.clear()
+
+
+def load_cube(path, predicates=None, progress=None):
+    """Return the cube for `path`, built at most once per file version and predicate set.
+
+    The file is streamed in chunks (see `scan`) with `predicates` applied to each chunk;
+    `progress(fraction)` reports how much of it has been read. The dashboards pass
+    CUBE_PREDICATES. A fresh binary snapshot built with the same predicates (see
+    snapshot.py) is opened instead of the CSV.
+    When a cube for an earlier version of the same file exists, the new version is diffed
+    against it and only the affected cells are recomputed.
+    """
+    pred_key = predicate_key(predicates)
+    if not is_hashed(path):
+        import snapshot  # snapshot imports this module
+        snapshot.seed_hash(path)
+    key = file_fingerprint(path) + (pred_key,)
+    cube = _cubes.get(key)
+    if cube is not None:
+        profiling.cache_event('cube', hit=True)
+        return cube
+    with _lock:
+        cube = _cubes.get(key)
+        profiling.cache_event('cube', hit=cube is not None)
+        if cube is not None:
+            return cube
+        previous = [_cubes[k] for k in _cubes if k[0] == key[0] and k[-1] == pred_key]
+        if not previous:
+            import snapshot
+            with profiling.stage('open_snapshot'):
+                cube = snapshot.open_snapshot(path, predicates)
+        if cube is None:
+            with profiling.stage('read_csv'):
+                grouped, fingerprint = scan(path, predicates, progress=progress)
+            # Cubes built without a fingerprint (e.g. by hand from a frame) are rebuilt in full
+            if previous and previous[-1].fingerprint is not None:
+                with profiling.stage('refresh_cube'):
+                    cube = refresh_cube(previous[-1], grouped, fingerprint)
+            else:
+                with profiling.stage('build_cube'):
+                    cube = Cube(cube_frame(grouped), fingerprint)
+        # Older versions of the file under the same predicates
+        for old in [k for k in _cubes if k[0] == key[0] and k[-1] == pred_key]:
+            del _cubes[old]
+        _cubes[key] = cube
+
+    if cube.changes is not None:
+        for listener in list(_refresh_listeners):
+            listener(cube.changes)
+    return cube
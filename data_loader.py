@@ -0,0 +1,113 @@
+import hashlib
+import os
+
+import pandas as pd
+
+# Columns the pipeline actually uses; the label/note columns are never read
+USECOLS = ['ref_area', 'source', 'sex', 'classif1', 'classif2', 'time', 'obs_value', 'obs_status',
+           'ilo_sample_count']
+
+# Low-cardinality code columns are stored as categoricals
+CATEGORICAL_COLS = ['ref_area', 'source', 'sex', 'classif1', 'classif2', 'obs_status']
+
+DTYPES = {col: 'category' for col in CATEGORICAL_COLS}
+NUMERIC_DTYPES = {'time': 'int16', 'obs_value': 'float64', 'ilo_sample_count': 'float64'}
+DTYPES.update(NUMERIC_DTYPES)
+
+# Rows per chunk when streaming large bulk files
+CHUNK_ROWS = int(os.environ.get('INGEST_CHUNK_ROWS', 200_000))
+
+# Content hashes memoised on (path, size, mtime_ns) so reruns never re-read the file
+_hashes = {}
+
+
+def _stat_key(path):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return (path, st.st_size, st.st_mtime_ns)
+
+
+def is_hashed(path):
+    """True if the current version of `path` already has a known content hash."""
+    return _stat_key(path) in _hashes
+
+
+def seed_fingerprint(path, size, mtime_ns, sha1):
+    """Record a hash computed elsewhere (e.g. stored in a snapshot) for a file version."""
+    _hashes[(os.path.abspath(path), size, mtime_ns)] = sha1
+
+
+def file_fingerprint(path):
+    """Return (path, size, mtime_ns, sha1) identifying the file's current contents."""
+    stat_key = _stat_key(path)
+    path = stat_key[0]
+    digest = _hashes.get(stat_key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        _hashes[stat_key] = digest
+    return stat_key + (digest,)
+
+
+def data_key(data):
+    """Content hash of a (small) derived frame, for caches keyed on what they were computed from."""
+    h = hashlib.sha1()
+    h.update(repr(list(data.columns)).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def read_dataset(path):
+    """Parse the whole CSV with only the used columns and compact dtypes (see `memory_report`)."""
+    return pd.read_csv(path, usecols=USECOLS, dtype=DTYPES)
+
+
+def iter_chunks(path, predicates=None, chunksize=CHUNK_ROWS, progress=None):
+    """Stream `path` in chunks of `chunksize` rows, yielding only rows that pass `predicates`.
+
+    `predicates` maps a column to the values to keep, e.g. `{'sex': ['SEX_M', 'SEX_F']}`;
+    it may name columns outside USECOLS (such as `indicator`), which are dropped after
+    filtering. Code columns are categoricals whose categories differ per chunk; parsing
+    them so creates one string per distinct code instead of one per row.
+    `progress(fraction)` is called after each chunk with the share of the file read.
+    """
+    predicates = predicates or {}
+    usecols = USECOLS + [col for col in predicates if col not in USECOLS]
+    dtypes = {col: 'category' for col in usecols if col not in NUMERIC_DTYPES}
+    dtypes.update(NUMERIC_DTYPES)
+    size = os.path.getsize(path) or 1
+    with open(path, 'rb') as f:
+        for chunk in pd.read_csv(f, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+            for col, values in predicates.items():
+                chunk = chunk[chunk[col].isin(values)]
+            if progress is not None:
+                progress(min(f.tell() / size, 1.0))
+            yield chunk[USECOLS]
+
+
+def clear_cache():
+    _hashes.clear()
+
+
+def memory_report(path):
+    """Compare the in-memory size of the naive `pd.read_csv` frame with the pruned, typed parse."""
+    naive_bytes = int(pd.read_csv(path).memory_usage(deep=True).sum())
+    loaded_bytes = int(read_dataset(path).memory_usage(deep=True).sum())
+    return {
+        'naive_bytes': naive_bytes,
+        'loaded_bytes': loaded_bytes,
+        'saved_bytes': naive_bytes - loaded_bytes,
+        'saved_pct': 100.0 * (naive_bytes - loaded_bytes) / naive_bytes if naive_bytes else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    import sys
+
+    report = memory_report(sys.argv[1] if len(sys.argv) > 1 else 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv')
+    print(f"naive frame:  {report['naive_bytes']:,} bytes")
+    print(f"loaded frame: {report['loaded_bytes']:,} bytes")
+    print(f"saved:        {report['saved_bytes']:,} bytes ({report['saved_pct']:.1f}%)")
@@ -0,0 +1,174 @@
+"""Headless export of the fixed_app.py sections to an HTML/PNG report bundle.
+
+Renders every chart section (and the descriptive statistics table) once for the whole
+country list ("overview", as the dashboard shows it) and once per country, spread over
+a process pool. Each worker loads the cube once and writes its images straight to disk.
+
+    python export.py [--countries BRA ARG ...] [--out report] [--workers N] [--format png]
+
+The bundle holds `index.html`, one directory per scope with its own `index.html` and
+images, and `manifest.json` listing every file with its scope, section and render time.
+"""
+import argparse
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# charts selects the Agg backend, so it is imported before pyplot
+import charts
+import matplotlib.pyplot as plt
+from cube import CUBE_PREDICATES, load_cube
+from data_loader import file_fingerprint
+from facets import facet_pages
+from figure_cache import DPI
+from metrics import metrics_cache
+
+CSV = 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv'
+
+# (section, metrics table or None for the selection itself, chart), as in fixed_app.py
+SECTIONS = [
+    ("Descriptive Stats", 'desc_stats', None),
+    ("Female vs Male %", 'female_vs_male', 'female_vs_male'),
+    ("Gender Gap Over Time", 'gender_gap', 'gender_gap'),
+    ("Cross-Country Averages", 'cross_country_avg', 'country_lines'),
+    ("Gender Comparison by Country", 'mean_by_sex', 'gender_comparison'),
+    ("Trends by Country", None, 'small_multiples'),
+    ("Cross-Country (Both Genders)", 'cross_country_avg', 'country_lines'),
+    ("Combined Gender-Country Trends", None, 'combined_trends'),
+]
+
+_cube = None
+
+
+def slug(name):
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+def _init_worker(csv_path):
+    global _cube
+    _cube = load_cube(csv_path, CUBE_PREDICATES)
+
+
+def render_section(task):
+    """Render one (scope, countries, section) task into `out/<scope>/`; returns manifest entries."""
+    out, scope, countries, section, fmt = task
+    _, table, chart = next(s for s in SECTIONS if s[0] == section)
+    t0 = time.perf_counter()
+    data = _cube.select(countries)
+    frame = data if table is None else metrics_cache.get(data)[table]
+    entry = {'scope': scope, 'section': section}
+    if frame is None or frame.empty or (chart == 'gender_comparison' and not {'SEX_M', 'SEX_F'} <= set(frame)):
+        return [dict(entry, status='skipped', reason='needs both sexes' if frame is not None else 'no data')]
+
+    directory = os.path.join(out, scope)
+    os.makedirs(directory, exist_ok=True)
+    if chart is None:
+        path = os.path.join(directory, f'{slug(section)}.html')
+        with open(path, 'w') as f:
+            f.write(frame.to_html(index=False, float_format='{:.3f}'.format, border=0))
+        parts = [path]
+    elif chart == 'small_multiples':
+        pages = facet_pages(sorted(data['ref_area'].unique()))
+        parts = []
+        for i, page in enumerate(pages, 1):
+            name = slug(section) if len(pages) == 1 else f'{slug(section)}_p{i}'
+            parts.append(_save(charts.small_multiples(data[data['ref_area'].isin(page)]), directory, name, fmt))
+    else:
+        parts = [_save(getattr(charts, chart)(frame), directory, slug(section), fmt)]
+
+    seconds = (time.perf_counter() - t0) / len(parts)
+    return [dict(entry, status='ok', path=os.path.relpath(p, out), bytes=os.path.getsize(p),
+                 seconds=round(seconds, 4)) for p in parts]
+
+
+def _save(fig, directory, name, fmt):
+    path = os.path.join(directory, f'{name}.{fmt}')
+    try:
+        fig.savefig(path, format=fmt, dpi=DPI, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return path
+
+
+def tasks(out, countries, fmt):
+    """Overview tasks first (they are the largest), then every section for every country."""
+    scopes = [('overview', countries)] + [(country, [country]) for country in countries]
+    return [(out, scope, selection, section, fmt) for scope, selection in scopes for section, _, _ in SECTIONS]
+
+
+def write_index(out, scope, entries):
+    body = [f'<h1>{html.escape(scope)}</h1>']
+    for section, _, _ in SECTIONS:
+        body.append(f'<h2>{html.escape(section)}</h2>')
+        for entry in (e for e in entries if e['section'] == section):
+            if entry['status'] != 'ok':
+                body.append(f'<p><em>Not shown: {entry["reason"]}.</em></p>')
+            elif entry['path'].endswith('.html'):
+                with open(os.path.join(out, entry['path'])) as f:
+                    body.append(f.read())
+            else:
+                body.append(f'<img src="{html.escape(os.path.basename(entry["path"]))}" '
+                            f'alt="{html.escape(section)}" style="max-width:100%">')
+    with open(os.path.join(out, scope, 'index.html'), 'w') as f:
+        f.write(_page(scope, body))
+
+
+def _page(title, body):
+    return ('<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title></head><body>\n' + '\n'.join(body) + '\n</body></html>\n')
+
+
+def export(out='report', countries=None, workers=None, fmt='png', csv_path=CSV):
+    """Write the bundle for `countries` (default: every country) and return the manifest."""
+    started = time.perf_counter()
+    cube = load_cube(csv_path, CUBE_PREDICATES)
+    countries = sorted(countries or cube.countries())
+    missing = sorted(set(countries) - set(cube.countries()))
+    if missing:
+        raise ValueError(f"no data for {', '.join(missing)}")
+
+    os.makedirs(out, exist_ok=True)
+    work = tasks(out, countries, fmt)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(csv_path,)) as pool:
+        entries = [e for result in pool.map(render_section, work, chunksize=4) for e in result]
+
+    scopes = ['overview'] + countries
+    for scope in scopes:
+        os.makedirs(os.path.join(out, scope), exist_ok=True)
+        write_index(out, scope, [e for e in entries if e['scope'] == scope])
+    with open(os.path.join(out, 'index.html'), 'w') as f:
+        f.write(_page('Gendered Informality in Creative Occupations',
+                      ['<h1>Gendered Informality in Creative Occupations</h1>', '<ul>']
+                      + [f'<li><a href="{s}/index.html">{s}</a></li>' for s in scopes] + ['</ul>']))
+
+    _, size, _, sha1 = file_fingerprint(csv_path)
+    manifest = {
+        'source': {'path': os.path.basename(csv_path), 'size': size, 'sha1': sha1},
+        'format': fmt,
+        'countries': countries,
+        'sections': [section for section, _, _ in SECTIONS],
+        'workers': workers or os.cpu_count(),
+        'seconds': round(time.perf_counter() - started, 3),
+        'files': entries,
+    }
+    with open(os.path.join(out, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--countries', nargs='*', help='ISO3 codes (default: every country)')
+    parser.add_argument('--out', default='report')
+    parser.add_argument('--workers', type=int, help='processes (default: one per core)')
+    parser.add_argument('--format', default='png', choices=['png', 'svg'])
+    parser.add_argument('--csv', default=CSV)
+    args = parser.parse_args()
+
+    manifest = export(args.out, args.countries, args.workers, args.format, args.csv)
+    ok = sum(e['status'] == 'ok' for e in manifest['files'])
+    print(f"wrote {ok} files for {len(manifest['countries'])} countries to {args.out}/ "
+          f"in {manifest['seconds']:.1f} s with {manifest['workers']} workers")
@@ -0,0 +1,9 @@
+# Paging of per-country small multiples, shared by both chart backends and the apps.
+# Kept apart from charts.py so that paging does not import matplotlib.
+FACETS_PER_PAGE = 24
+
+
+def facet_pages(countries, per_page=FACETS_PER_PAGE):
+    """Split the country list into pages of at most `per_page` panels."""
+    countries = list(countries)
+    return [countries[i:i + per_page] for i in range(0, len(countries), per_page)] or [[]]
@@ -0,0 +1,115 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import profiling
+from data_loader import data_key
+
+# Byte budget for rendered images, shared by every session in the process
+DEFAULT_MAX_BYTES = int(os.environ.get('FIGURE_CACHE_BYTES', 64 * 1024 * 1024))
+DEFAULT_FORMAT = os.environ.get('FIGURE_CACHE_FORMAT', 'png')
+DPI = 120
+
+
+def style_key(style):
+    return repr(sorted(style.items()))
+
+
+class FigureCache:
+    """LRU cache of rendered figure bytes keyed on (section, data hash, style).
+
+    Entries are evicted oldest-first once the stored bytes exceed `max_bytes`.
+    Figures are closed as soon as they are rendered, so only bytes are kept. A key is
+    drawn by one caller at a time; concurrent misses on it wait for that image.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, fmt=DEFAULT_FORMAT):
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Countries drawn in each entry, for targeted invalidation after a data refresh
+        self._countries = {}
+        # {key: Event} for images being drawn, set once stored (or the draw failed)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, section, data, draw, **style):
+        """Return the image for `draw(data, **style)`, rendering only on a cache miss."""
+        key = (section, data_key(data), style_key(style), self.fmt)
+        while True:
+            with self._lock:
+                image = self._entries.get(key)
+                if image is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    profiling.cache_event('figure', hit=True)
+                    return image
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._pending[key] = threading.Event()
+                    break
+            # Another session (or the warm-up) is drawing this image; look again once it is done
+            pending.wait()
+
+        profiling.cache_event('figure', hit=False)
+        try:
+            image = self._draw(data, draw, style)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = image
+                self.nbytes += len(image)
+                if 'ref_area' in data.columns:
+                    self._countries[key] = frozenset(data['ref_area'])
+                self._evict()
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+        return image
+
+    def _draw(self, data, draw, style):
+        with profiling.stage('draw'):
+            fig = draw(data, **style)
+        try:
+            with profiling.stage('savefig'):
+                buf = io.BytesIO()
+                fig.savefig(buf, format=self.fmt, dpi=DPI, bbox_inches='tight')
+        finally:
+            # pyplot is loaded by the drawing function, so it is not imported before the first render
+            from matplotlib import pyplot as plt
+            plt.close(fig)
+        # st.image takes SVG as markup text and raster formats as bytes
+        return buf.getvalue().decode() if self.fmt == 'svg' else buf.getvalue()
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            key, image = self._entries.popitem(last=False)
+            self._countries.pop(key, None)
+            self.nbytes -= len(image)
+
+    def invalidate_countries(self, countries):
+        """Drop every cached figure that draws any of `countries`."""
+        countries = set(countries)
+        with self._lock:
+            for key in [k for k, drawn in self._countries.items() if drawn & countries]:
+                self.nbytes -= len(self._entries.pop(key))
+                del self._countries[key]
+
+    def on_data_refresh(self, changes):
+        self.invalidate_countries(changes['countries'])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._countries.clear()
+            self.nbytes = 0
+
+
+# Process-wide cache used by the dashboards
+figure_cache = FigureCache()
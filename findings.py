@@ -0,0 +1,224 @@
+"""Findings text for the dashboard sections, generated from the selected data.
+
+Per-country/sex trends and per-country gap trends are least-squares lines. All groups
+are fitted together from grouped sums (`np.bincount` over group codes), with no loop
+per country. The section text is then read off these tables, so it stays in step with
+the data and the country selection.
+"""
+import numpy as np
+import pandas as pd
+
+from rollups import weighted_rates
+
+# Gaps within this many rate points of zero count as parity
+PARITY = 0.02
+# Share of years the gap must keep its sign to be called persistent
+PERSISTENT = 0.75
+# Years of gap data a country needs before its gap is given a direction
+MIN_YEARS = 3
+# Fitted change over a country's span (rate points) below which a trend is "stable"
+STABLE = 0.02
+# Countries listed by name in ranked findings before summarising the rest
+TOP = 3
+
+SEX_NAMES = {'SEX_F': 'women', 'SEX_M': 'men'}
+
+
+def fit_trends(frame, keys, value):
+    """Least-squares line of `value` on `time` for every group of `keys`, fitted in one batch.
+
+    Returns one row per group with n_years, first_year, last_year, mean, slope (per year)
+    and change (fitted change from first to last year). Slopes of single-year groups are NaN.
+    """
+    frame = frame[frame[value].notna()]
+    codes, groups = pd.MultiIndex.from_frame(frame[keys]).factorize()
+    k = len(groups)
+    y = frame[value].to_numpy(float)
+    years = frame['time'].to_numpy(float)
+    # Centring time keeps the normal equations well conditioned
+    t = years - years.mean() if len(years) else years
+
+    n = np.bincount(codes, minlength=k)
+    st = np.bincount(codes, t, minlength=k)
+    sy = np.bincount(codes, y, minlength=k)
+    stt = np.bincount(codes, t * t, minlength=k)
+    sty = np.bincount(codes, t * y, minlength=k)
+    denom = n * stt - st * st
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where(denom > 1e-9, (n * sty - st * sy) / denom, np.nan)
+        mean = sy / n
+
+    first = np.full(k, np.inf)
+    last = np.full(k, -np.inf)
+    np.minimum.at(first, codes, years)
+    np.maximum.at(last, codes, years)
+
+    fits = groups.to_frame(index=False)
+    fits.columns = keys
+    fits['n_years'] = n
+    fits['first_year'] = first.astype('int64') if k else first
+    fits['last_year'] = last.astype('int64') if k else last
+    fits['mean'] = mean
+    fits['slope'] = slope
+    fits['change'] = slope * (last - first)
+    return fits.sort_values(keys, ignore_index=True)
+
+
+def gap_stats(data):
+    """Per-country F-M gap: mean, trend, share of years with each sign and direction.
+
+    Countries with fewer than MIN_YEARS years of gap data get direction 'insufficient'.
+    """
+    rates = data.set_index(['ref_area', 'time', 'sex'])['informality_rate'].unstack('sex')
+    if not {'SEX_F', 'SEX_M'}.issubset(rates.columns):
+        return None
+    gaps = (rates['SEX_F'] - rates['SEX_M']).rename('gender_gap').dropna().reset_index()
+    stats = fit_trends(gaps, ['ref_area'], 'gender_gap')
+    codes = pd.Categorical(gaps['ref_area'], categories=stats['ref_area']).codes
+    k = len(stats)
+    stats['share_f_higher'] = np.bincount(codes, gaps['gender_gap'] > PARITY, minlength=k) / stats['n_years']
+    stats['share_m_higher'] = np.bincount(codes, gaps['gender_gap'] < -PARITY, minlength=k) / stats['n_years']
+    stats['direction'] = np.select(
+        [stats['n_years'] < MIN_YEARS, stats['share_f_higher'] >= PERSISTENT,
+         stats['share_m_higher'] >= PERSISTENT, stats['mean'].abs() <= PARITY],
+        ['insufficient', 'women', 'men', 'parity'],
+        'mixed',
+    )
+    return stats
+
+
+def compute_findings(data):
+    """Tables the findings text is generated from, for one selection of the cube.
+
+    `trends` has a line per country/sex, `levels` a line per country over both sexes
+    combined as in the cross-country charts, `gaps` the gap statistics (None with one
+    sex) and `coverage` each country's last year.
+    """
+    trends = fit_trends(data, ['ref_area', 'sex'], 'informality_rate')
+    combined = weighted_rates(data, ['ref_area', 'time'])
+    levels = fit_trends(combined, ['ref_area'], 'informality_rate')
+    coverage = levels[['ref_area', 'first_year', 'last_year']]
+    return {'trends': trends, 'levels': levels, 'gaps': gap_stats(data), 'coverage': coverage}
+
+
+def _pct(rate):
+    return f"{rate:.0%}"
+
+
+def _names(countries):
+    return ', '.join(countries) if len(countries) else 'none'
+
+
+def _trend_word(change):
+    if np.isnan(change):
+        return 'one year only'
+    if change > STABLE:
+        return f"rising (+{change * 100:.0f} pts)"
+    if change < -STABLE:
+        return f"falling ({change * 100:.0f} pts)"
+    return 'stable'
+
+
+def level_lines(f):
+    """Highest and lowest mean informality over the selected years."""
+    levels = f['levels'].sort_values('mean', ascending=False)
+    if levels.empty:
+        return []
+    ranked = [f"{row.ref_area} ({_pct(row.mean)})" for row in levels.itertuples()]
+    if len(ranked) <= 2 * TOP:
+        return [f"**Highest to lowest mean informality**: {', '.join(ranked)}."]
+    return [f"**Highest mean informality**: {', '.join(ranked[:TOP])}.",
+            f"**Lowest mean informality**: {', '.join(ranked[-TOP:][::-1])}."]
+
+
+def gap_lines(f):
+    """Countries grouped by the direction and persistence of their gender gap."""
+    gaps = f['gaps']
+    if gaps is None or gaps.empty:
+        return ["Both sexes are needed to compare women and men."]
+    lines = []
+    by = {d: gaps[gaps['direction'] == d] for d in ['women', 'men', 'parity', 'mixed', 'insufficient']}
+    for direction in ['women', 'men']:
+        group = by[direction].sort_values('mean', ascending=direction == 'men')
+        if not group.empty:
+            items = [f"{row.ref_area} ({row.mean * 100:+.0f} pts, {row.n_years} yr{'s' * (row.n_years > 1)})"
+                     for row in group.itertuples()]
+            lines.append(f"**{direction.capitalize()} more likely to be informal** in at least "
+                         f"{PERSISTENT:.0%} of years: {', '.join(items)}.")
+    if not by['parity'].empty:
+        lines.append(f"**Near parity** (mean gap within {PARITY * 100:.0f} pts): "
+                     f"{_names(by['parity']['ref_area'])}.")
+    if not by['mixed'].empty:
+        lines.append(f"**No persistent direction**: {_names(by['mixed']['ref_area'])}.")
+    if not by['insufficient'].empty:
+        items = [f"{row.ref_area} ({row.n_years} yr{'s' * (row.n_years > 1)})"
+                 for row in by['insufficient'].itertuples()]
+        lines.append(f"**Insufficient data** (fewer than {MIN_YEARS} years with both sexes): "
+                     f"{', '.join(items)}.")
+    moving = gaps[(gaps['direction'] != 'insufficient') & (gaps['change'].abs() > STABLE)].sort_values('change')
+    if len(moving) > 2 * TOP:
+        moving = pd.concat([moving.head(TOP), moving.tail(TOP)])
+    if not moving.empty:
+        items = [f"{row.ref_area} ({row.change * 100:+.0f} pts over {row.first_year}–{row.last_year})"
+                 for row in moving.itertuples()]
+        lines.append(f"**Largest gap trends** (positive = moving towards women): {', '.join(items)}.")
+    return lines
+
+
+def trend_lines(f):
+    """Fitted direction of each country's rate, by sex."""
+    trends = f['trends']
+    if trends.empty:
+        return []
+    wide = trends.pivot(index='ref_area', columns='sex', values='change')
+    if len(wide) > 4 * TOP:
+        # Summarise long selections by direction instead of listing every country
+        combined = f['levels']
+        rising = combined.loc[combined['change'] > STABLE, 'ref_area']
+        falling = combined.loc[combined['change'] < -STABLE, 'ref_area']
+        stable = combined.loc[combined['change'].abs() <= STABLE, 'ref_area']
+        return [f"**Rising informality** (both sexes): {_names(rising)}.",
+                f"**Falling informality**: {_names(falling)}.",
+                f"**Stable** (within {STABLE * 100:.0f} pts): {_names(stable)}."]
+    lines = []
+    for country, row in wide.iterrows():
+        parts = [f"{SEX_NAMES.get(sex, sex)} {_trend_word(row[sex])}" for sex in ['SEX_M', 'SEX_F'] if sex in row]
+        lines.append(f"**{country}**: {'; '.join(parts)}.")
+    return lines
+
+
+def coverage_lines(f):
+    """Countries whose data ends before the latest year in the selection."""
+    coverage = f['coverage']
+    if coverage.empty:
+        return []
+    latest = int(coverage['last_year'].max())
+    early = coverage[coverage['last_year'] < latest]
+    if early.empty:
+        return [f"**Coverage**: every selected country has data up to {latest}."]
+    ends = ', '.join(f"{year} for {_names(group['ref_area'])}"
+                     for year, group in early.groupby('last_year', sort=True))
+    return [f"**Coverage**: data ends in {ends}; the others extend to {latest}. "
+            f"Comparisons for later years cover fewer countries."]
+
+
+# Findings shown under each fixed_app.py section
+SECTION_LINES = {
+    'Descriptive Stats': [level_lines, gap_lines],
+    'Female vs Male %': [gap_lines],
+    'Gender Gap Over Time': [gap_lines],
+    'Cross-Country Averages': [level_lines, trend_lines, coverage_lines],
+    'Gender Comparison by Country': [gap_lines],
+    'Trends by Country': [trend_lines],
+    'Cross-Country (Both Genders)': [level_lines, coverage_lines],
+    'Combined Gender-Country Trends': [gap_lines, coverage_lines],
+    'Summary Findings': [level_lines, gap_lines, trend_lines, coverage_lines],
+}
+
+
+def findings_markdown(section, f):
+    """Markdown bullet list of the findings for `section`."""
+    if f['levels'].empty:
+        return "No informality rates for the selected countries."
+    lines = [line for make in SECTION_LINES.get(section, []) for line in make(f)]
+    return '\n'.join(f"* {line}" for line in lines)
@@ -0,0 +1,156 @@
+"""Several ILOSTAT indicators on the shared (ref_area, time, sex, classif1) key.
+
+Each registered indicator is one bulk file reduced to a single value per key. Files
+are loaded lazily on a thread pool: `get` loads one indicator, `prefetch` starts
+several at once, and `view` loads only the indicators it joins. Loads are cached per
+file version, so a revised file is picked up on the next call.
+The pandas C parser releases the GIL, so files on the pool are parsed in parallel.
+
+    from indicators import indicator_store
+    indicator_store.register('earnings', 'EAR_...csv', label='Mean monthly earnings', agg='mean')
+    joined = indicator_store.view(['informality_rate', 'earnings'], countries=['BRA', 'COL'])
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import profiling
+from cube import CREATIVE, CUBE_PREDICATES, GENDERS, load_cube
+from data_loader import file_fingerprint
+
+KEY = ['ref_area', 'time', 'sex', 'classif1']
+WORKERS = int(os.environ.get('INDICATOR_WORKERS', min(4, os.cpu_count() or 1)))
+
+INFORMALITY_FILE = 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv'
+
+
+class Indicator:
+    """One value per key from a bulk file.
+
+    Rows are kept when their classif2 is `classif2` (any when None). Rows left for the
+    same key, e.g. from several sources, are combined with `agg`: 'sum' for counts and
+    'mean' for rates and averages.
+    """
+
+    def __init__(self, name, path, label=None, classif2=None, agg='sum', loader=None):
+        if agg not in ('sum', 'mean'):
+            raise ValueError(f"agg must be 'sum' or 'mean', got {agg!r}")
+        self.name = name
+        self.path = path
+        self.label = label or name
+        self.classif2 = classif2
+        self.agg = agg
+        self._loader = loader
+
+    def load(self):
+        """Frame of KEY + [name]; runs on the store's pool."""
+        if self._loader is not None:
+            return self._loader(self)
+        return read_indicator(self.path, self.name, self.classif2, self.agg)
+
+
+def read_indicator(path, name, classif2=None, agg='sum'):
+    """Parse an ILOSTAT bulk file into KEY + [name]."""
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [col for col in KEY + ['obs_value'] if col not in header]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)} column; cannot key it on {KEY}")
+    usecols = KEY + ['obs_value'] + (['classif2'] if classif2 is not None else [])
+    dtypes = {col: 'str' for col in usecols if col not in ('time', 'obs_value')}
+    rows = pd.read_csv(path, usecols=usecols, dtype=dtypes)
+    if classif2 is not None:
+        rows = rows[rows['classif2'] == classif2]
+    rows = rows.astype({'time': 'int64'})
+    values = rows.groupby(KEY, sort=True)['obs_value'].agg(agg)
+    return values.rename(name).reset_index()
+
+
+def _informality(indicator):
+    return load_cube(indicator.path, CUBE_PREDICATES).flat[KEY + ['informality_rate']].rename(
+        columns={'informality_rate': indicator.name})
+
+
+class IndicatorStore:
+    """Registered indicators, loaded on first use and shared by every session in the process.
+
+    Loaded frames are shared and must not be mutated.
+    """
+
+    def __init__(self, workers=WORKERS):
+        self.indicators = {}
+        # {name: (file fingerprint, Future)}; a pending future makes concurrent callers wait on one load
+        self._loads = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='indicator')
+
+    def register(self, name, path, label=None, classif2=None, agg='sum', loader=None):
+        with self._lock:
+            self.indicators[name] = Indicator(name, path, label, classif2, agg, loader)
+            self._loads.pop(name, None)
+
+    def available(self):
+        """Names of the registered indicators whose files exist."""
+        return [name for name, ind in self.indicators.items() if os.path.exists(ind.path)]
+
+    def loaded(self):
+        """Names of the indicators currently held in memory."""
+        with self._lock:
+            return [name for name, (_, future) in self._loads.items() if future.done()]
+
+    def prefetch(self, names):
+        """Start loading `names` in the background; returns their futures."""
+        futures = []
+        for name in names:
+            indicator = self.indicators[name]
+            fingerprint = file_fingerprint(indicator.path)
+            with self._lock:
+                entry = self._loads.get(name)
+                # A failed load is retried rather than cached
+                hit = (entry is not None and entry[0] == fingerprint
+                       and not (entry[1].done() and entry[1].exception() is not None))
+                if not hit:
+                    entry = (fingerprint, self._pool.submit(indicator.load))
+                    self._loads[name] = entry
+            profiling.cache_event('indicator', hit=hit)
+            futures.append(entry[1])
+        return futures
+
+    def get(self, name):
+        """KEY + [name] frame for one indicator, loading it on first use."""
+        with profiling.stage(f'indicator:{name}'):
+            return self.prefetch([name])[0].result()
+
+    def view(self, names, countries=None, classif1=CREATIVE, sexes=GENDERS, how='inner'):
+        """Indicators `names` side by side, one column each, joined on KEY.
+
+        All of them load concurrently; the selection is applied to each frame before
+        the join. `how='outer'` keeps keys missing from some indicators.
+        """
+        if not names:
+            raise ValueError("view needs at least one indicator")
+        with profiling.stage('indicator_view'):
+            futures = self.prefetch(names)
+            joined = None
+            for future in futures:
+                frame = future.result()
+                keep = frame['classif1'] == classif1
+                if countries is not None:
+                    keep &= frame['ref_area'].isin(countries)
+                if sexes is not None:
+                    keep &= frame['sex'].isin(sexes)
+                frame = frame[keep]
+                joined = frame if joined is None else joined.merge(frame, on=KEY, how=how)
+            return joined.sort_values(KEY, ignore_index=True)
+
+    def clear(self):
+        with self._lock:
+            self._loads.clear()
+
+
+# Process-wide store used by the dashboards, with the indicators in this repository's data
+indicator_store = IndicatorStore()
+indicator_store.register('informality_rate', INFORMALITY_FILE, label='Informality rate', loader=_informality)
+indicator_store.register('employment', INFORMALITY_FILE, label='Employment (thousands)',
+                         classif2='IFL_NATURE_TOTAL', agg='sum')
@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from cube import is_unreliable
+from data_loader import data_key
+from findings import compute_findings
+from rollups import weighted_rates
+
+# Named tables produced for every selection
+TABLES = ['desc_stats', 'mean_by_sex', 'female_vs_male', 'gender_gap', 'cross_country_avg', 'reliability']
+
+MAX_ENTRIES = 256
+
+
+def compute_metrics(data):
+    """Derive every section's table from one selection of the cube.
+
+    One grouped aggregation gives the per-country/sex statistics and reliability sums,
+    and one reshape of the rates to (ref_area, time) x sex gives the per-year gap;
+    everything else is read off those two, except the combined rates, which are weighted
+    sums of the counts (see rollups.py). Tables that need both sexes are None when one
+    is missing.
+    """
+    grouped = data.groupby(['ref_area', 'sex'], sort=True)
+    desc_stats = grouped['informality_rate'].agg(['mean', 'median', 'min', 'max', 'count'])
+    desc_stats.columns = ['mean_informality', 'median_informality', 'min_informality',
+                          'max_informality', 'count_obs']
+    desc_stats = desc_stats.reset_index()
+
+    # Sample-weighted mean rate and count of unreliable cells per country/sex, summed
+    # over the same group codes
+    codes = grouped.ngroup().to_numpy()
+    k = len(desc_stats)
+    rate = data['informality_rate'].to_numpy()
+    samples = data['sample_count'].to_numpy(float)
+    weights = np.where(np.isnan(rate), 0, samples)
+    weight = np.bincount(codes, weights, minlength=k)
+    weighted = np.bincount(codes, np.where(weights > 0, rate * weights, 0), minlength=k)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weighted_mean = np.where(weight > 0, weighted / weight, np.nan)
+    reliability = pd.DataFrame({
+        'ref_area': desc_stats['ref_area'],
+        'sex': desc_stats['sex'],
+        'sample_count': np.bincount(codes, samples, minlength=k).astype('int64'),
+        'unreliable_obs': np.bincount(codes, is_unreliable(data), minlength=k).astype('int64'),
+        'weighted_mean_informality': weighted_mean,
+    })
+
+    mean_by_sex = desc_stats.pivot(index='ref_area', columns='sex', values='mean_informality').reset_index()
+    rates = data.set_index(['ref_area', 'time', 'sex'])['informality_rate'].unstack('sex')
+    both = {'SEX_F', 'SEX_M'}.issubset(rates.columns)
+
+    female_vs_male = None
+    gender_gap = None
+    if both:
+        female_vs_male = mean_by_sex.copy()
+        female_vs_male['female_vs_male_pct'] = (female_vs_male['SEX_F'] / female_vs_male['SEX_M']) * 100
+        gender_gap = rates.dropna(how='all').reset_index()
+        gender_gap['gender_gap'] = gender_gap['SEX_F'] - gender_gap['SEX_M']
+
+    # Both sexes combined as one weighted rate (summed informal over summed total)
+    cross_country_avg = weighted_rates(data, ['ref_area', 'time'])[['ref_area', 'time', 'informality_rate']]
+
+    return {
+        'desc_stats': desc_stats,
+        'mean_by_sex': mean_by_sex,
+        'female_vs_male': female_vs_male,
+        'gender_gap': gender_gap,
+        'cross_country_avg': cross_country_avg,
+        'reliability': reliability,
+    }
+
+
+class MetricsCache:
+    """LRU cache of a selection's derived tables, keyed on the content of the selection.
+
+    Each entry holds the `compute_metrics` tables and, once a findings section has asked
+    for them, the `findings.compute_findings` tables of the same selection. A table set
+    is computed by one caller at a time; concurrent misses on it wait for the result.
+    Cached tables are shared between sessions and must not be mutated.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # {data_key: {'metrics': tables, 'findings': tables}}
+        self._entries = OrderedDict()
+        self._countries = {}
+        # {(data_key, name): Event} for table sets being computed
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, data):
+        """The `compute_metrics` tables for `data`."""
+        return self._lookup(data, 'metrics', compute_metrics)
+
+    def findings(self, data):
+        """The `findings.compute_findings` tables for `data`."""
+        return self._lookup(data, 'findings', compute_findings)
+
+    def _lookup(self, data, name, compute):
+        key = data_key(data)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and name in entry:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    profiling.cache_event(name, hit=True)
+                    return entry[name]
+                pending = self._pending.get((key, name))
+                if pending is None:
+                    self._pending[(key, name)] = threading.Event()
+                    break
+            # Another session (or the warm-up) is computing these tables; look again once it is done
+            pending.wait()
+
+        profiling.cache_event(name, hit=False)
+        try:
+            with profiling.stage(f'compute_{name}'):
+                tables = compute(data)
+            with self._lock:
+                self.misses += 1
+                self._entries.setdefault(key, {})[name] = tables
+                self._entries.move_to_end(key)
+                self._countries[key] = frozenset(data['ref_area'])
+                while len(self._entries) > self.max_entries:
+                    old, _ = self._entries.popitem(last=False)
+                    self._countries.pop(old, None)
+        finally:
+            with self._lock:
+                self._pending.pop((key, name)).set()
+        return tables
+
+    def on_data_refresh(self, changes):
+        """Drop tables computed over any country affected by a data refresh."""
+        countries = set(changes['countries'])
+        with self._lock:
+            for key in [k for k, drawn in self._countries.items() if drawn & countries]:
+                del self._entries[key]
+                del self._countries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._countries.clear()
+
+
+# Process-wide cache used by the dashboards
+metrics_cache = MetricsCache()
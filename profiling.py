@@ -0,0 +1,180 @@
+"""Per-rerun stage timing for the dashboards.
+
+Each script run opens a rerun record with `start_rerun`; code wraps its stages in
+`stage(name)` and caches report lookups with `cache_event`. `finish_rerun` closes the
+record, writes it as one JSON line to the `dashboard.profile` logger and returns it
+for `show_panel`. Every stage records wall time, CPU time of the running thread,
+memory allocated while it ran, and the cache hits and misses it saw.
+
+Profiling is off unless `DASHBOARD_PROFILE` is set (`log`, or `panel` to also show the
+sidebar panel); when off, `stage` and `cache_event` do nothing. Records are kept per
+thread, which is per session because Streamlit runs each script run in its own thread.
+Memory comes from tracemalloc, which is process-wide, so with concurrent sessions the
+allocation figures include other sessions' work.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+MODE = os.environ.get('DASHBOARD_PROFILE', '')
+ENABLED = MODE in ('log', 'panel')
+LOG_PATH = os.environ.get('DASHBOARD_PROFILE_LOG')
+
+logger = logging.getLogger('dashboard.profile')
+if ENABLED:
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        handler = logging.FileHandler(LOG_PATH) if LOG_PATH else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+_local = threading.local()
+
+
+class Stage:
+    """Timing of one named stage; use as a context manager or with start()/stop()."""
+
+    def __init__(self, name):
+        self.name = name
+        self.depth = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.alloc = 0
+        self.net = 0
+        self.cache = {}
+        self._rerun = None
+
+    def start(self):
+        rerun = getattr(_local, 'rerun', None)
+        if rerun is None:
+            return self
+        self._rerun = rerun
+        self.depth = len(rerun.open)
+        current, peak = tracemalloc.get_traced_memory()
+        if rerun.open:
+            parent = rerun.open[-1]
+            parent._peak = max(parent._peak, peak)
+        tracemalloc.reset_peak()
+        self._mem0 = self._peak = current
+        rerun.open.append(self)
+        rerun.stages.append(self)
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.thread_time()
+        return self
+
+    def stop(self):
+        rerun = self._rerun
+        if rerun is None:
+            return
+        self.wall = time.perf_counter() - self._wall0
+        self.cpu = time.thread_time() - self._cpu0
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        self.alloc = self._peak - self._mem0
+        self.net = current - self._mem0
+        rerun.open.remove(self)
+        if rerun.open:
+            parent = rerun.open[-1]
+            parent._peak = max(parent._peak, self._peak)
+        tracemalloc.reset_peak()
+        self._rerun = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'wall_ms': round(self.wall * 1000, 3),
+            'cpu_ms': round(self.cpu * 1000, 3),
+            'alloc_bytes': self.alloc,
+            'net_bytes': self.net,
+            'cache': self.cache,
+        }
+
+
+class Rerun:
+    def __init__(self, app):
+        self.app = app
+        self.stages = []
+        self.open = []
+        self.total = Stage('rerun')
+        self.cache = {}
+        self.started = time.time()
+
+    def as_dict(self):
+        return {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(self.started)) + 'Z',
+            'app': self.app,
+            'thread': threading.current_thread().name,
+            **{k: v for k, v in self.total.as_dict().items() if k not in ('name', 'depth')},
+            'cache': self.cache,
+            'stages': [s.as_dict() for s in self.stages if s is not self.total],
+        }
+
+
+def stage(name):
+    return Stage(name)
+
+
+def cache_event(cache, hit):
+    """Count a lookup in `cache` against the innermost open stage and the rerun."""
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None:
+        return
+    outcome = 'hit' if hit else 'miss'
+    for counts in (rerun.cache, rerun.open[-1].cache if rerun.open else None):
+        if counts is not None:
+            entry = counts.setdefault(cache, {'hit': 0, 'miss': 0})
+            entry[outcome] += 1
+
+
+def start_rerun(app):
+    """Open the profiling record for this script run (no-op when profiling is off)."""
+    if not ENABLED:
+        return None
+    rerun = Rerun(app)
+    _local.rerun = rerun
+    rerun.total.start()
+    return rerun
+
+
+def finish_rerun():
+    """Close and log this script run's record; returns it, or None when profiling is off."""
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None:
+        return None
+    for open_stage in reversed(rerun.open):
+        open_stage.stop()
+    _local.rerun = None
+    logger.info(json.dumps(rerun.as_dict()))
+    return rerun
+
+
+def show_panel(rerun):
+    """Sidebar table of this rerun's stages, shown when DASHBOARD_PROFILE=panel."""
+    if rerun is None or MODE != 'panel':
+        return
+    import pandas as pd
+    import streamlit as st
+
+    record = rerun.as_dict()
+    with st.sidebar.expander(f"Profiling: {record['wall_ms']:.0f} ms"):
+        st.caption(f"CPU {record['cpu_ms']:.0f} ms · allocated {record['alloc_bytes'] / 2**20:.1f} MiB")
+        rows = [{
+            'stage': ' ' * (s['depth'] - 1) + s['name'],
+            'wall ms': s['wall_ms'],
+            'cpu ms': s['cpu_ms'],
+            'alloc KiB': s['alloc_bytes'] // 1024,
+            'cache': ' '.join(f"{c} {v['hit']}/{v['hit'] + v['miss']}" for c, v in s['cache'].items()),
+        } for s in record['stages']]
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
@@ -0,0 +1,145 @@
+"""Weighted informality rates for groups of countries.
+
+A group's rate is its summed informal employment over its summed formal + informal
+employment. An average of country rates would weight Tuvalu like Brazil, so it is
+not used. Sums are grouped reductions (`np.bincount` over group codes) of the cube's
+count columns. Only cells with both counts contribute, so a missing formal or informal
+figure never leaves a one-sided total.
+
+Groupings are the columns of country_groups.csv (ILO region and World Bank income group),
+or any {group: [countries]} mapping; a country may belong to several user-defined sets.
+Rollups of the whole cube are cached per cube and grouping.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from cube import CREATIVE
+
+GROUPS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'country_groups.csv')
+# Groupings in GROUPS_FILE and their display names
+GROUPINGS = {'ilo_region': 'ILO region', 'income_group': 'Income group'}
+# Display name of the one-line rollup of the dashboard's country selection
+SELECTED = 'Selected countries combined'
+# Rollups kept per cube; user-defined sets add one entry each
+MAX_ENTRIES = 64
+
+# {(path, mtime_ns): DataFrame}
+_groups = {}
+# {Cube: OrderedDict(rollup key: DataFrame)}; entries go with their cube
+_rollups = weakref.WeakKeyDictionary()
+# {(Cube, rollup key): Event} for rollups being computed; concurrent misses wait on it
+_pending = {}
+_lock = threading.Lock()
+
+
+def load_groups(path=GROUPS_FILE):
+    """Country-to-group table indexed by ref_area, re-read when the file changes."""
+    key = (path, os.stat(path).st_mtime_ns)
+    groups = _groups.get(key)
+    if groups is None:
+        groups = pd.read_csv(path, dtype=str, keep_default_na=False).set_index('ref_area')
+        _groups.clear()
+        _groups[key] = groups
+    return groups
+
+
+def weighted_rates(data, by):
+    """Summed counts and the weighted informality rate for every group of `by` in `data`.
+
+    `data` has the cube's formal, informal and sample_count columns. n_cells counts the
+    cells that contributed.
+    """
+    codes, groups = pd.MultiIndex.from_frame(data[by]).factorize()
+    k = len(groups)
+    formal = data['formal'].to_numpy(float)
+    informal = data['informal'].to_numpy(float)
+    valid = ~(np.isnan(formal) | np.isnan(informal))
+    formal_sum = np.bincount(codes, np.where(valid, formal, 0), minlength=k)
+    informal_sum = np.bincount(codes, np.where(valid, informal, 0), minlength=k)
+    total = formal_sum + informal_sum
+
+    out = groups.to_frame(index=False)
+    out.columns = by
+    out['formal'] = formal_sum
+    out['informal'] = informal_sum
+    out['total'] = total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['informality_rate'] = np.where(total > 0, informal_sum / total, np.nan)
+    out['n_cells'] = np.bincount(codes, valid, minlength=k).astype('int64')
+    out['sample_count'] = np.bincount(codes, np.where(valid, data['sample_count'].to_numpy(float), 0),
+                                      minlength=k).astype('int64')
+    return out.sort_values(by, ignore_index=True)
+
+
+def _memberships(grouping):
+    """(ref_area, group) pairs for a grouping name or a {group: [countries]} mapping."""
+    if isinstance(grouping, str):
+        groups = load_groups()
+        if grouping not in groups.columns:
+            raise ValueError(f"unknown grouping {grouping!r}; expected one of {list(groups.columns)} or a mapping")
+        pairs = groups[grouping].rename('group').reset_index()
+        return pairs[pairs['group'] != '']
+    return pd.DataFrame([(area, group) for group, areas in grouping.items() for area in areas],
+                        columns=['ref_area', 'group'])
+
+
+def _key(grouping, by_sex, classif1):
+    if isinstance(grouping, str):
+        name = grouping
+    else:
+        name = tuple(sorted((group, tuple(sorted(areas))) for group, areas in grouping.items()))
+    return name, by_sex, classif1
+
+
+def rollup(cube, grouping, by_sex=True, classif1=CREATIVE):
+    """Weighted rates per (group, time[, sex]) over every country of `cube` in each group.
+
+    Cached per cube; the returned frame is shared and must not be mutated.
+    """
+    key = _key(grouping, by_sex, classif1)
+    while True:
+        with _lock:
+            cached = _rollups.setdefault(cube, OrderedDict())
+            table = cached.get(key)
+            if table is not None:
+                cached.move_to_end(key)
+                break
+            pending = _pending.get((cube, key))
+            if pending is None:
+                _pending[(cube, key)] = threading.Event()
+                break
+        # Another session (or the warm-up) is computing this rollup; look again once it is done
+        pending.wait()
+    profiling.cache_event('rollup', hit=table is not None)
+    if table is not None:
+        return table
+    try:
+        with profiling.stage('rollup'):
+            cells = cube.select(classif1=classif1).merge(_memberships(grouping), on='ref_area')
+            table = weighted_rates(cells, ['group', 'time'] + (['sex'] if by_sex else []))
+        with _lock:
+            cached[key] = table
+            while len(cached) > MAX_ENTRIES:
+                cached.popitem(last=False)
+    finally:
+        with _lock:
+            _pending.pop((cube, key)).set()
+    return table
+
+
+def group_lines(cube, label, countries=()):
+    """Combined-sex weighted rate per (group, time) for a grouping picked by display name.
+
+    `label` is a value of GROUPINGS, or SELECTED to roll `countries` into one line.
+    """
+    if label == SELECTED:
+        grouping = {SELECTED: list(countries)}
+    else:
+        grouping = next(name for name, display in GROUPINGS.items() if display == label)
+    return rollup(cube, grouping, by_sex=False)[['group', 'time', 'informality_rate']]
@@ -0,0 +1,28 @@
+"""Start a dashboard with its caches pre-warmed in the background while the server boots.
+
+Equivalent to `streamlit run <app> [options]`, plus warmup.start(): by the time the first
+visitor connects, the cube, the default views' tables and (with the matplotlib backend)
+their figures are usually cached in this server process. Any further arguments are passed
+to `streamlit run`.
+
+    python serve.py [fixed_app.py | app.py] [--server.port 8501 ...]
+"""
+import logging
+import os
+import sys
+
+from streamlit.web import cli
+
+import warmup
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    app = args.pop(0) if args and not args[0].startswith('-') else 'fixed_app.py'
+    # The apps open the data file relative to their own directory
+    os.chdir(ROOT)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    warmup.start()
+    sys.argv = ['streamlit', 'run', os.path.join(ROOT, app), *args]
+    sys.exit(cli.main())
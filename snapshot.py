@@ -0,0 +1,143 @@
+"""Memory-mapped binary snapshot of the informality cube.
+
+A snapshot is a directory next to the CSV (`<name>.snapshot/`) holding one `.npy`
+file per cube column, in the cube's row order: the value columns, `time`, and int32
+codes for classif1, ref_area and sex. These are the non-empty cells of the dense
+(classif1, ref_area, time, sex) grid, stored contiguously. Arrays are opened with
+`mmap_mode='r'` and `Cube.flat`'s numeric columns are views of them, so every server
+process maps the same pages. Only the three code columns are rebuilt per process.
+The cube's row fingerprint (fp_key/fp_value/fp_cell) is stored too, so a revised CSV
+refreshes incrementally. `meta.json` holds the code dictionaries, their labels, the
+predicates the cube was built with (CUBE_PREDICATES by default) and the fingerprint of
+the CSV the snapshot was built from. `load_cube` opens it only for the same predicates.
+
+    python snapshot.py [EMP_TEM2_SEX_EC4_IFL_NB_A.csv]
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cube import CUBE_COLUMNS, CUBE_INDEX, CUBE_PREDICATES, Cube, cube_frame, predicate_key, scan
+from data_loader import file_fingerprint, seed_fingerprint
+
+FORMAT_VERSION = 4
+# Columns stored as int32 codes into meta['dims']
+CODE_COLS = ['classif1', 'ref_area', 'sex']
+FINGERPRINT = {'fp_key': 'key', 'fp_value': 'value', 'fp_cell': 'cell'}
+ARRAYS = CODE_COLS + ['time'] + CUBE_COLUMNS + list(FINGERPRINT)
+
+LABEL_COLS = ['ref_area', 'sex', 'classif1']
+
+
+def snapshot_dir(csv_path):
+    return os.path.splitext(os.path.abspath(csv_path))[0] + '.snapshot'
+
+
+def cell_arrays(flat, fingerprint):
+    """Code dictionaries and the arrays to store, from a cube's `flat` table and fingerprint."""
+    dims, arrays = {}, {}
+    for name in CODE_COLS:
+        codes, uniques = pd.factorize(flat[name], sort=True)
+        dims[name] = list(uniques)
+        arrays[name] = codes.astype(np.int32)
+    arrays['time'] = flat['time'].to_numpy(np.int64)
+    for name in CUBE_COLUMNS:
+        arrays[name] = flat[name].to_numpy()
+    arrays['fp_key'] = fingerprint.index.to_numpy(np.uint64)
+    arrays['fp_value'] = fingerprint['value'].to_numpy(np.uint64)
+    arrays['fp_cell'] = fingerprint['cell'].to_numpy(np.uint64)
+    return dims, arrays
+
+
+def read_labels(csv_path):
+    cols = [c for col in LABEL_COLS for c in (col, f'{col}.label')]
+    labels = pd.read_csv(csv_path, usecols=cols, dtype=str).drop_duplicates()
+    return {col: dict(zip(labels[col], labels[f'{col}.label'])) for col in LABEL_COLS}
+
+
+def write_snapshot(csv_path, out=None, predicates=CUBE_PREDICATES):
+    """Build the cube from `csv_path` and write its snapshot; returns the snapshot directory."""
+    out = out or snapshot_dir(csv_path)
+    fingerprint = file_fingerprint(csv_path)
+    grouped, rows = scan(csv_path, predicates)
+    dims, arrays = cell_arrays(cube_frame(grouped).reset_index(), rows)
+
+    tmp = out + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, f'{name}.npy'), array)
+    meta = {
+        'version': FORMAT_VERSION,
+        'source': {'size': fingerprint[1], 'mtime_ns': fingerprint[2], 'sha1': fingerprint[3]},
+        'predicates': {col: list(values) for col, values in (predicates or {}).items()},
+        'rows': len(arrays['time']),
+        'dims': dims,
+        'labels': read_labels(csv_path),
+    }
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+    return out
+
+
+def read_meta(csv_path):
+    try:
+        with open(os.path.join(snapshot_dir(csv_path), 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv_path, meta):
+    """True if `meta` describes the CSV as it is on disk now (same size and mtime)."""
+    if meta is None or meta.get('version') != FORMAT_VERSION:
+        return False
+    st = os.stat(csv_path)
+    return (meta['source']['size'], meta['source']['mtime_ns']) == (st.st_size, st.st_mtime_ns)
+
+
+def open_arrays(csv_path):
+    directory = snapshot_dir(csv_path)
+    return {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+
+
+def seed_hash(csv_path):
+    """Reuse a fresh snapshot's recorded CSV hash so cold start doesn't re-read the CSV."""
+    meta = read_meta(csv_path)
+    if is_fresh(csv_path, meta):
+        src = meta['source']
+        seed_fingerprint(csv_path, src['size'], src['mtime_ns'], src['sha1'])
+
+
+def open_snapshot(csv_path, predicates=CUBE_PREDICATES):
+    """Return a Cube backed by the snapshot of `csv_path`, or None if it is missing, stale
+    or built with other predicates."""
+    meta = read_meta(csv_path)
+    if (not is_fresh(csv_path, meta) or meta['source']['sha1'] != file_fingerprint(csv_path)[3]
+            or predicate_key(meta['predicates']) != predicate_key(predicates)):
+        return None
+    arrays = open_arrays(csv_path)
+
+    columns = {}
+    for name in CUBE_INDEX:
+        if name == 'time':
+            columns[name] = arrays[name]
+        else:
+            columns[name] = pd.array(meta['dims'][name], dtype=str).take(arrays[name])
+    columns.update((name, arrays[name]) for name in CUBE_COLUMNS)
+    # copy=False keeps the numeric columns as views of the mapped pages
+    flat = pd.DataFrame(columns, copy=False)
+    fingerprint = pd.DataFrame({col: arrays[name] for name, col in FINGERPRINT.items() if col != 'key'},
+                               index=pd.Index(arrays['fp_key'], name='key', copy=False), copy=False)
+    return Cube(None, fingerprint, flat=flat)
+
+
+if __name__ == '__main__':
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv'
+    print(f"wrote {write_snapshot(csv_path)}")
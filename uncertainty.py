@@ -0,0 +1,141 @@
+"""Sampling intervals for informality rates, gender gaps and female/male ratios.
+
+Every cube cell's rate is resampled as a binomial proportion: `DRAWS` draws of
+informal respondents out of the cell's `ilo_sample_count`, at the cell's estimated
+rate. Each cell is one row of a (cells x DRAWS) array. The per-year F-M gaps and
+the per-country F/M ratios of mean rates are computed from the paired draws of
+the two sexes, so they are never computed one cell at a time.
+
+Countries are split into chunks that run on a thread pool. NumPy's binomial
+sampler releases the GIL, so chunks use every core. Each chunk has its own child
+seed, so the intervals do not depend on the number of workers. Results are computed once per
+cube, which means once per snapshot or file version, and are shared by every session.
+"""
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from cube import CREATIVE
+
+DRAWS = int(os.environ.get('UNCERTAINTY_DRAWS', 2000))
+LEVEL = 0.95
+SEED = 0
+# Countries per task; bounds each task's draw array to roughly chunk cells x DRAWS
+CHUNK_COUNTRIES = 64
+WORKERS = os.cpu_count() or 1
+
+# Key columns of each interval table
+KEYS = {
+    'rate': ['ref_area', 'time', 'sex'],
+    'gap': ['ref_area', 'time'],
+    'ratio': ['ref_area'],
+}
+
+# {Cube: {'rate': ..., 'gap': ..., 'ratio': ...}}; entries go with their cube
+_intervals = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _bounds(draws):
+    """Lower and upper percentile of each row; rows with any NaN give NaN."""
+    tail = (1 - LEVEL) / 2 * 100
+    if not draws.size:
+        return np.empty(len(draws)), np.empty(len(draws))
+    lo, hi = np.percentile(draws, [tail, 100 - tail], axis=1)
+    return lo, hi
+
+
+def _country_means(draws, areas):
+    """Per-country mean over years of each draw column, skipping cells with no draws.
+
+    `areas` is sorted, so each country's cells are one contiguous run of rows.
+    """
+    if not len(areas):
+        return areas, draws
+    starts = np.flatnonzero(np.r_[True, areas[1:] != areas[:-1]])
+    valid = ~np.isnan(draws[:, 0])
+    sums = np.add.reduceat(np.where(valid[:, None], draws, 0), starts, axis=0)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts[:, None]
+    return areas[starts], means
+
+
+def _chunk_intervals(rows, draws, seed):
+    """Interval tables for the cells of some whole countries, sorted by (ref_area, time, sex)."""
+    rng = np.random.default_rng(seed)
+    n = rows['sample_count'].to_numpy()
+    p = rows['informality_rate'].to_numpy()
+    ok = (n > 0) & np.isfinite(p)
+
+    sim = np.full((len(rows), draws), np.nan)
+    sim[ok] = rng.binomial(n[ok, None], p[ok, None], size=(int(ok.sum()), draws)) / n[ok, None]
+    rate_lo, rate_hi = _bounds(sim)
+    rate = rows[KEYS['rate']].assign(rate_lo=rate_lo, rate_hi=rate_hi)
+
+    # Row positions of each (ref_area, time)'s female and male cell
+    pos = pd.Series(np.arange(len(rows)), index=pd.MultiIndex.from_frame(rows[KEYS['rate']]))
+    pairs = pos.unstack('sex').reindex(columns=['SEX_F', 'SEX_M']).dropna()
+    f, m = pairs['SEX_F'].to_numpy(np.intp), pairs['SEX_M'].to_numpy(np.intp)
+    gap_lo, gap_hi = _bounds(sim[f] - sim[m])
+    gap = pairs.index.to_frame(index=False).assign(gap_lo=gap_lo, gap_hi=gap_hi)
+
+    # F/M ratio of each country's mean rate over its years, per draw
+    sex = rows['sex'].to_numpy()
+    areas = rows['ref_area'].to_numpy()
+    female_areas, female = _country_means(sim[sex == 'SEX_F'], areas[sex == 'SEX_F'])
+    male_areas, male = _country_means(sim[sex == 'SEX_M'], areas[sex == 'SEX_M'])
+    common, fi, mi = np.intersect1d(female_areas, male_areas, return_indices=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio_lo, ratio_hi = _bounds(female[fi] / male[mi] * 100)
+    ratio = pd.DataFrame({'ref_area': common, 'ratio_lo': ratio_lo, 'ratio_hi': ratio_hi})
+    return {'rate': rate, 'gap': gap, 'ratio': ratio}
+
+
+def compute_intervals(cube, classif1=CREATIVE, draws=DRAWS, workers=WORKERS, seed=SEED):
+    """Interval tables for every male/female cell of `cube`.
+
+    Returns {'rate': (ref_area, time, sex, rate_lo, rate_hi),
+             'gap': (ref_area, time, gap_lo, gap_hi),
+             'ratio': (ref_area, ratio_lo, ratio_hi)}, where the gap is female minus male
+    and the ratio is the female mean rate over the male mean rate as a percent, matching
+    metrics.py. Cells without a rate or sample count get no interval.
+    """
+    countries = cube.countries(classif1)
+    chunks = [countries[i:i + CHUNK_COUNTRIES] for i in range(0, len(countries), CHUNK_COUNTRIES)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(cube.select(chunk, classif1=classif1), draws, s) for chunk, s in zip(chunks, seeds)]
+    if workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(lambda task: _chunk_intervals(*task), tasks))
+    else:
+        parts = [_chunk_intervals(*task) for task in tasks]
+    if not parts:
+        parts = [_chunk_intervals(cube.select([], classif1=classif1), draws, seed)]
+    return {kind: pd.concat([part[kind] for part in parts], ignore_index=True) for kind in KEYS}
+
+
+def intervals(cube):
+    """Interval tables for `cube`, computed once per cube and shared across sessions."""
+    tables = _intervals.get(cube)
+    if tables is not None:
+        profiling.cache_event('intervals', hit=True)
+        return tables
+    with _lock:
+        tables = _intervals.get(cube)
+        profiling.cache_event('intervals', hit=tables is not None)
+        if tables is None:
+            with profiling.stage('compute_intervals'):
+                tables = compute_intervals(cube)
+            _intervals[cube] = tables
+    return tables
+
+
+def with_intervals(table, cube, kind):
+    """`table` with the `kind` interval columns of its rows joined on."""
+    return table.merge(intervals(cube)[kind], on=KEYS[kind], how='left')
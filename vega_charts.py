@@ -0,0 +1,200 @@
+import json
+
+from cube import is_unreliable
+
+# Vega-Lite versions of the charts in charts.py. Each function has the same name and
+# arguments as its matplotlib counterpart and returns a spec dict with the data embedded,
+# so legend toggling, zoom and tooltips run in the browser instead of on the server.
+
+SCHEMA = 'https://vega.github.io/schema/vega-lite/v5.json'
+PX_PER_INCH = 60
+
+SEX_COLORS = {'domain': ['SEX_M', 'SEX_F'], 'range': ['#1f77b4', '#ff7f0e']}
+YEAR = {'field': 'time', 'type': 'quantitative', 'title': 'Year', 'axis': {'format': 'd'}}
+
+
+def _values(data):
+    # to_json turns NaN into null and NumPy scalars into plain JSON numbers
+    return json.loads(data.to_json(orient='records'))
+
+
+def _spec(data, figsize, **spec):
+    return {
+        '$schema': SCHEMA,
+        'data': {'values': _values(data)},
+        'width': 'container',
+        'height': figsize[1] * PX_PER_INCH,
+        **spec,
+    }
+
+
+def _lines(y, series, title=None, y_title=None):
+    """Line layer with legend-bound series toggling, scale-bound zoom and tooltips."""
+    return {
+        'params': [
+            {'name': 'series', 'select': {'type': 'point', 'fields': [series]}, 'bind': 'legend'},
+            {'name': 'zoom', 'select': 'interval', 'bind': 'scales'},
+        ],
+        'mark': {'type': 'line', 'point': True, 'tooltip': True},
+        'encoding': {
+            'x': YEAR,
+            'y': {'field': y, 'type': 'quantitative', 'title': y_title or y},
+            'color': {'field': series, 'type': 'nominal', 'title': title},
+            'opacity': {'condition': {'param': 'series', 'value': 1}, 'value': 0.15},
+        },
+    }
+
+
+def _rule(value, color):
+    return {
+        'data': {'values': [{}]},
+        'mark': {'type': 'rule', 'color': color, 'strokeDash': [4, 4]},
+        'encoding': {'y': {'datum': value}},
+    }
+
+
+# -------- fixed_app.py --------
+def female_vs_male(pivot_gender, figsize=(10, 6)):
+    x = {'field': 'ref_area', 'type': 'nominal', 'title': None}
+    y = {'field': 'female_vs_male_pct', 'type': 'quantitative', 'title': 'Female vs male (%)'}
+    interval = [c for c in ('ratio_lo', 'ratio_hi') if c in pivot_gender.columns]
+    layers = [
+        {'mark': {'type': 'bar', 'color': 'skyblue', 'tooltip': True}, 'encoding': {'x': x, 'y': y}},
+        {
+            'transform': [{'calculate': "format(datum.female_vs_male_pct, '.1f') + '%'", 'as': 'label'}],
+            'mark': {'type': 'text', 'baseline': 'bottom', 'dy': -2},
+            'encoding': {'x': x, 'y': y, 'text': {'field': 'label'}},
+        },
+        _rule(100, 'red'),
+    ]
+    if interval:
+        layers.insert(1, {
+            'mark': {'type': 'errorbar', 'ticks': True, 'color': 'dimgray'},
+            'encoding': {'x': x, 'y': dict(y, field='ratio_lo'), 'y2': {'field': 'ratio_hi'}},
+        })
+    return _spec(pivot_gender[['ref_area', 'female_vs_male_pct'] + interval], figsize, layer=layers)
+
+
+def gender_gap(gender_gap, figsize=(12, 6)):
+    interval = [c for c in ('gap_lo', 'gap_hi') if c in gender_gap.columns]
+    layers = [
+        _lines('gender_gap', 'ref_area', y_title='Female − male informality rate'),
+        _rule(0, 'black'),
+    ]
+    if interval:
+        layers.insert(0, {
+            'mark': {'type': 'area', 'opacity': 0.15},
+            'encoding': {
+                'x': YEAR,
+                'y': {'field': 'gap_lo', 'type': 'quantitative'},
+                'y2': {'field': 'gap_hi'},
+                'color': {'field': 'ref_area', 'type': 'nominal', 'title': None},
+            },
+        })
+    return _spec(gender_gap[['ref_area', 'time', 'gender_gap'] + interval], figsize, layer=layers)
+
+
+def country_lines(cross_country_avg, figsize=(12, 6), series='ref_area'):
+    return _spec(cross_country_avg[[series, 'time', 'informality_rate']], figsize,
+                 **_lines('informality_rate', series, y_title='Informality Rate'))
+
+
+def gender_comparison(pivot_gender, figsize=(12, 6), bar_width=0.35):
+    return _spec(pivot_gender[['ref_area', 'SEX_M', 'SEX_F']], figsize, **{
+        'transform': [
+            {'fold': ['SEX_M', 'SEX_F'], 'as': ['sex', 'informality_rate']},
+            {'calculate': "datum.sex == 'SEX_M' ? 'Male' : 'Female'", 'as': 'gender'},
+        ],
+        'params': [{'name': 'series', 'select': {'type': 'point', 'fields': ['gender']}, 'bind': 'legend'}],
+        'mark': {'type': 'bar', 'tooltip': True},
+        'encoding': {
+            'x': {'field': 'ref_area', 'type': 'nominal', 'title': None},
+            'xOffset': {'field': 'gender', 'sort': ['Male', 'Female']},
+            'y': {'field': 'informality_rate', 'type': 'quantitative', 'title': 'Mean Informality Rate'},
+            'color': {'field': 'gender', 'type': 'nominal', 'sort': ['Male', 'Female'], 'title': None},
+            'opacity': {'condition': {'param': 'series', 'value': 1}, 'value': 0.15},
+        },
+    })
+
+
+def combined_trends(filtered_data, figsize=(12, 6)):
+    spec = _lines('informality_rate', 'series', y_title='Informality Rate')
+    spec['transform'] = [{'calculate': "datum.ref_area + '-' + datum.sex", 'as': 'series'}]
+    return _spec(filtered_data[['ref_area', 'sex', 'time', 'informality_rate']], figsize, **spec)
+
+
+# -------- app.py --------
+def average_by_gender(gender_avg, figsize=(10, 6)):
+    return _spec(gender_avg[['ref_area', 'sex', 'informality_rate']], figsize, **{
+        'title': 'Average Informality by Gender',
+        'transform': [{'calculate': "datum.ref_area + '-' + (datum.sex == 'SEX_M' ? 'M' : 'F')", 'as': 'bar'}],
+        'mark': {'type': 'bar', 'tooltip': True},
+        'encoding': {
+            'x': {'field': 'bar', 'type': 'nominal', 'title': None},
+            'y': {'field': 'informality_rate', 'type': 'quantitative', 'title': 'Mean Informality Rate'},
+            'color': {'field': 'ref_area', 'type': 'nominal', 'legend': None},
+        },
+    })
+
+
+def cross_country(cross_country_avg, figsize=(12, 6)):
+    spec = country_lines(cross_country_avg, figsize)
+    spec['title'] = 'Cross-Country Average Informality Rates'
+    spec['encoding']['y']['title'] = 'Mean Informality Rate'
+    return spec
+
+
+# -------- small multiples --------
+def small_multiples(data, sexes=('SEX_M', 'SEX_F'), ncols=4, panel_size=(3.0, 2.2)):
+    data = data[data['sex'].isin(sexes)]
+    values = data[['ref_area', 'sex', 'time', 'informality_rate']]
+    if 'status' in data.columns:
+        values = values.assign(unreliable=is_unreliable(data))
+    y = {'field': 'informality_rate', 'type': 'quantitative', 'title': 'Informality Rate',
+         'scale': {'domain': [0, 1]}}
+    layers = [{
+        'params': [
+            {'name': 'series', 'select': {'type': 'point', 'fields': ['sex']}, 'bind': 'legend'},
+        ],
+        'mark': {'type': 'line', 'point': True, 'tooltip': True},
+        'encoding': {
+            'x': YEAR,
+            'y': y,
+            'color': {'field': 'sex', 'type': 'nominal', 'title': 'Gender', 'scale': SEX_COLORS},
+            'opacity': {'condition': {'param': 'series', 'value': 1}, 'value': 0.15},
+        },
+    }]
+    if 'unreliable' in values.columns:
+        layers.append({
+            'transform': [{'filter': 'datum.unreliable'}],
+            'mark': {'type': 'point', 'shape': 'cross', 'color': 'red', 'size': 60, 'tooltip': True},
+            'encoding': {'x': YEAR, 'y': y},
+        })
+    return {
+        '$schema': SCHEMA,
+        'data': {'values': _values(values)},
+        'facet': {'field': 'ref_area', 'type': 'nominal', 'title': None},
+        'columns': ncols,
+        'spec': {
+            'width': panel_size[0] * PX_PER_INCH,
+            'height': panel_size[1] * PX_PER_INCH,
+            'layer': layers,
+        },
+    }
+
+
+# -------- joined indicators --------
+def indicator_scatter(joined, x, y, x_label=None, y_label=None, figsize=(10, 6)):
+    return _spec(joined[['ref_area', 'time', 'sex', x, y]], figsize, **{
+        'params': [
+            {'name': 'series', 'select': {'type': 'point', 'fields': ['sex']}, 'bind': 'legend'},
+            {'name': 'zoom', 'select': 'interval', 'bind': 'scales'},
+        ],
+        'mark': {'type': 'point', 'filled': True, 'tooltip': True},
+        'encoding': {
+            'x': {'field': x, 'type': 'quantitative', 'title': x_label or x},
+            'y': {'field': y, 'type': 'quantitative', 'title': y_label or y},
+            'color': {'field': 'sex', 'type': 'nominal', 'title': 'Gender', 'scale': SEX_COLORS},
+            'opacity': {'condition': {'param': 'series', 'value': 0.8}, 'value': 0.1},
+        },
+    })
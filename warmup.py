@@ -0,0 +1,107 @@
+"""Pre-warming of the process-wide caches, for a server that has just started.
+
+`prewarm` does the first visitor's work ahead of time. It builds the cube, then the
+metrics, findings, intervals and rollups of each dashboard's default view. With the matplotlib
+backend it also renders the fixed_app.py chart sections for the default countries
+into the figure cache. `start` runs this once per process on a daemon thread; serve.py
+calls it while the server boots. Every cache here is keyed on content and computes a
+given key once: a session that asks for a key the warm-up is still computing waits for
+that result instead of repeating the work.
+
+Set DASHBOARD_PREWARM=0 to switch it off.
+"""
+import logging
+import os
+import threading
+import time
+
+from cube import CUBE_PREDICATES, DEFAULT_COUNTRIES, GENDERS, load_cube
+from metrics import metrics_cache
+
+CSV = 'EMP_TEM2_SEX_EC4_IFL_NB_A.csv'
+ENABLED = os.environ.get('DASHBOARD_PREWARM', '1') != '0'
+
+logger = logging.getLogger('dashboard.warmup')
+
+_started = None
+_lock = threading.Lock()
+
+
+def fixed_app_views(cube, countries):
+    """(section, frame, chart) for fixed_app.py's chart sections in their default state.
+
+    Mirrors what the sections pass to `show_chart`, so the rendered images land under
+    the keys the sessions look up.
+    """
+    from facets import facet_pages
+    from uncertainty import with_intervals
+
+    data = cube.select(countries)
+    tables = metrics_cache.get(data)
+    page = data[data['ref_area'].isin(facet_pages(sorted(data['ref_area'].unique()))[0])]
+    views = [
+        ("Cross-Country Averages", tables['cross_country_avg'], "country_lines"),
+        ("Gender Comparison by Country", tables['mean_by_sex'], "gender_comparison"),
+        ("Trends by Country", page, "small_multiples"),
+        ("Cross-Country (Both Genders)", tables['cross_country_avg'], "country_lines"),
+        ("Combined Gender-Country Trends", data, "combined_trends"),
+    ]
+    if tables['female_vs_male'] is not None:
+        views.insert(0, ("Female vs Male %", with_intervals(tables['female_vs_male'], cube, "ratio"),
+                         "female_vs_male"))
+        views.insert(1, ("Gender Gap Over Time", with_intervals(tables['gender_gap'], cube, "gap"),
+                         "gender_gap"))
+    return views
+
+
+def prewarm(csv_path=CSV, figures=True):
+    """Fill the caches for both dashboards' default views; returns {step: seconds}."""
+    from chart_backend import CHART_BACKEND
+    from rollups import GROUPINGS, rollup
+
+    timings = {}
+    t0 = time.perf_counter()
+    cube = load_cube(csv_path, CUBE_PREDICATES)
+    timings['cube'] = time.perf_counter() - t0
+    all_countries = cube.countries()
+    countries = [c for c in DEFAULT_COUNTRIES if c in all_countries]
+
+    t0 = time.perf_counter()
+    # app.py opens on the default countries, both sexes and 2015-2024
+    lo, hi = cube.year_range()
+    metrics_cache.get(cube.select(countries, GENDERS, (max(2015, lo), min(2024, hi))))
+    views = fixed_app_views(cube, countries)
+    metrics_cache.findings(cube.select(countries))
+    for grouping in GROUPINGS:
+        rollup(cube, grouping, by_sex=False)
+    timings['tables'] = time.perf_counter() - t0
+
+    if figures and CHART_BACKEND == 'matplotlib':
+        import charts
+        from figure_cache import figure_cache
+
+        t0 = time.perf_counter()
+        for section, frame, chart in views:
+            figure_cache.render(section, frame, getattr(charts, chart))
+        timings['figures'] = time.perf_counter() - t0
+    return timings
+
+
+def start(csv_path=CSV):
+    """Run `prewarm` on a background thread, once per process; returns the thread or None."""
+    global _started
+    if not ENABLED:
+        return None
+    with _lock:
+        if _started is None:
+            def run():
+                try:
+                    timings = prewarm(csv_path)
+                    logger.info("prewarmed caches: %s",
+                                ', '.join(f"{k} {v * 1000:.0f} ms" for k, v in timings.items()))
+                except Exception:
+                    logger.exception("prewarming failed; sessions will fill the caches instead")
+
+            _started = threading.Thread(target=run, name='prewarm', daemon=True)
+            _started.start()
+    return _started